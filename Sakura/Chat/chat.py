@@ -1,70 +1,297 @@
-import base64
-from typing import Optional, Dict
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional, Dict
 
-from google import genai
+from google.genai import types
 
-from Sakura.Core.config import GEMINI_API_KEY, AI_MODEL
+from Sakura.Core.config import (
+    GEMINI_API_KEYS,
+    AI_MODEL,
+    FAST_MODEL,
+    VISION_MODEL,
+    FAST_MAX_CHARS,
+    STREAM_RESPONSES,
+    HEDGE_REQUESTS,
+    HEDGE_MODEL,
+    HEDGE_PERCENTILE,
+    HEDGE_MIN_DELAY,
+    BUDGET_MODEL,
+    BUDGET_CONTEXT,
+)
 from Sakura.Core.logging import logger
 from Sakura.Core.helpers import log_action, get_fallback, get_error
-from Sakura.Database.conversation import get_history, update_history
-from Sakura.Chat.prompts import SAKURA_PROMPT
+from Sakura.Database.records import UserRecord, load_record, save_record
+from Sakura.Chat.persona import generation_config, reject_persona_cache
+from Sakura.Chat.context import fit_history
+from Sakura.Chat.pool import ClientPool, GeminiKey, gemini_breaker
+from Sakura.Services import metrics
+from Sakura.Services.admission import gemini_admission, Overloaded
+from Sakura.Services.usage import (
+    new_usage,
+    record_usage,
+    budget_tier,
+    TIER_REDUCED,
+    TIER_FALLBACK,
+)
 from Sakura import state
 
 def init_client():
     """Initialize Google Gemini client for chat."""
-    if not GEMINI_API_KEY:
+    if not GEMINI_API_KEYS:
         logger.warning("⚠️ No Gemini API key found, chat functionality will be disabled.")
         return
 
-    logger.info("🫡 Initializing Google GenAI API key.")
+    logger.info(f"🫡 Initializing Google GenAI with {len(GEMINI_API_KEYS)} API key(s).")
     try:
-        state.gemini_client = genai.Client(api_key=GEMINI_API_KEY)
+        state.gemini_pool = ClientPool(GEMINI_API_KEYS)
         logger.info("✅ Chat client (Gemini) initialized successfully")
     except Exception as e:
         logger.error(f"❌ Failed to initialize chat client: {e}")
 
+def build_contents(
+    history: list,
+    user_name: str,
+    user_message: str,
+    image_bytes: Optional[bytes] = None,
+    summary: Optional[str] = None,
+    image_description: Optional[str] = None
+) -> list:
+    """
+    Build structured multi-turn contents for a request.
+
+    The persona travels in the generation config, history follows as alternating
+    turns and everything request-specific (user name, image) sits in the last turn,
+    so consecutive requests share the longest possible prefix. A running summary of
+    older messages, if any, leads the history.
+    """
+    contents = []
+    if summary:
+        contents.append(types.Content(
+            role="user",
+            parts=[types.Part.from_text(text=f"Summary of our earlier conversation: {summary}")]
+        ))
+    contents += [
+        types.Content(
+            role="user" if msg["role"] == "user" else "model",
+            parts=[types.Part.from_text(text=msg["content"])]
+        )
+        for msg in history
+    ]
+
+    if image_description:
+        text = (f"{user_name} sent an image. What it shows: {image_description}\n"
+                f"Caption: '{user_message or 'No caption'}'\n\nReact to the image.")
+        parts = [types.Part.from_text(text=text)]
+    elif image_bytes:
+        text = f"{user_name} sent an image. Caption: '{user_message or 'No caption'}'\n\nDescribe what you see."
+        parts = [types.Part.from_text(text=text), types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg")]
+    else:
+        parts = [types.Part.from_text(text=f"{user_name}: {user_message}")]
+    contents.append(types.Content(role="user", parts=parts))
+    return contents
+
+def route_model(user_message: str, image_bytes: Optional[bytes] = None) -> str:
+    """Pick the model for a request: images to VISION_MODEL, short plain text to FAST_MODEL"""
+    if image_bytes:
+        metrics.increment("route_vision")
+        return VISION_MODEL
+    if len(user_message) <= FAST_MAX_CHARS and "\n" not in user_message:
+        metrics.increment("route_fast")
+        return FAST_MODEL
+    metrics.increment("route_default")
+    return AI_MODEL
+
+async def stream_text(
+    key: GeminiKey,
+    model: str,
+    contents: list,
+    on_text: Callable[[str], Awaitable[None]],
+    tokens: Optional[dict] = None
+) -> str:
+    """Stream a Gemini response, passing the accumulated text to on_text per chunk"""
+    text = ""
+    usage = None
+    config = generation_config(key, model)
+    try:
+        stream = await key.client.aio.models.generate_content_stream(
+            model=model,
+            contents=contents,
+            config=config
+        )
+        async for chunk in stream:
+            usage = chunk.usage_metadata or usage
+            if chunk.text:
+                text += chunk.text
+                await on_text(text)
+    except Exception as e:
+        reject_persona_cache(key, config, e)
+        raise
+    record_usage(usage, tokens)
+    return text.strip()
+
+async def complete_text(
+    model: str,
+    contents: list,
+    config: Optional[types.GenerateContentConfig] = None,
+    tokens: Optional[dict] = None
+) -> str:
+    """Run one non-streaming Gemini generation on a pooled key (with the persona unless a config is given)"""
+    async def request(key: GeminiKey):
+        attached = config or generation_config(key, model)
+        try:
+            return await key.client.aio.models.generate_content(model=model, contents=contents, config=attached)
+        except Exception as e:
+            reject_persona_cache(key, attached, e)
+            raise
+
+    response = await state.gemini_pool.call(request)
+    record_usage(response.usage_metadata, tokens)
+    return response.text.strip() if response.text else ""
+
+async def hedged_text(
+    model: str,
+    contents: list,
+    config: Optional[types.GenerateContentConfig] = None,
+    tokens: Optional[dict] = None
+) -> str:
+    """
+    Complete a generation, hedging slow requests with a second one.
+
+    If the primary request is still running after the adaptive HEDGE_PERCENTILE of
+    recent latencies, a backup request goes to HEDGE_MODEL (or the same model on the
+    least loaded key). The first answer wins and the other request is cancelled.
+    Backups only run when an admission slot is free right away. Both requests add
+    their tokens to tokens, since both are billed.
+    """
+    metrics.increment("hedge_eligible")
+    delay = max(HEDGE_MIN_DELAY, metrics.percentile("gemini_complete", HEDGE_PERCENTILE, HEDGE_MIN_DELAY))
+    primary = asyncio.create_task(complete_text(model, contents, config, tokens))
+    pending = {primary}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done or not gemini_admission.try_acquire():
+            metrics.increment("hedge_skipped")
+            return await primary
+
+        metrics.increment("hedge_fired")
+        backup = asyncio.create_task(complete_text(HEDGE_MODEL or model, contents, config, tokens))
+        backup.add_done_callback(lambda _: gemini_admission.release())
+        pending = {primary, backup}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    metrics.increment("hedge_wins" if task is backup else "hedge_losses")
+                    return task.result()
+        return await primary
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def generate(
+    contents: list,
+    model: str = AI_MODEL,
+    on_text: Optional[Callable[[str], Awaitable[None]]] = None,
+    config: Optional[types.GenerateContentConfig] = None,
+    tokens: Optional[dict] = None
+) -> str:
+    """
+    Run one Gemini generation once admitted, raises Overloaded when shed or while
+    the Gemini breaker is open.
+
+    Streams to on_text when given, and uses config instead of the persona when given
+    (config is ignored for streamed generations). Reported token counts are added to
+    tokens when given.
+    """
+    # Fail fast instead of queueing for a slot the breaker would refuse anyway
+    gemini_breaker.check()
+    await gemini_admission.acquire()
+    try:
+        started = time.perf_counter()
+        if on_text and STREAM_RESPONSES:
+            # Text already shown to the user must not be streamed a second time
+            text = await gemini_breaker.call(
+                lambda: state.gemini_pool.call(lambda key: stream_text(key, model, contents, on_text, tokens)),
+                retries=0
+            )
+        else:
+            complete = hedged_text if HEDGE_REQUESTS else complete_text
+            text = await gemini_breaker.call(lambda: complete(model, contents, config, tokens))
+            metrics.observe("gemini_complete", time.perf_counter() - started)
+        metrics.observe("gemini_latency", time.perf_counter() - started)
+        return text
+    finally:
+        gemini_admission.release()
+
 async def get_response(
     user_message: str,
     user_id: int,
     user_info: Dict[str, any],
-    image_bytes: Optional[bytes] = None
+    image_bytes: Optional[bytes] = None,
+    turn_id: Optional[str] = None,
+    history_message: Optional[str] = None,
+    record: Optional[UserRecord] = None,
+    on_text: Optional[Callable[[str], Awaitable[None]]] = None,
+    image_description: Optional[str] = None
 ) -> str:
-    """Get response from Gemini API."""
+    """
+    Get response from Gemini API and commit the turn to history.
+
+    When on_text is given and STREAM_RESPONSES is enabled the response is streamed,
+    and on_text receives the text generated so far after every chunk. An image is
+    passed either as raw bytes or as a cached image_description (text only).
+
+    Users past their daily token budget get a shorter context and BUDGET_MODEL, and
+    past the hard limit a fallback response without any AI call. Without a record the
+    user's record is loaded and saved here, so the turn and its token counters are
+    still written in one round trip.
+    """
     user_name = user_info.get("first_name", "User")
     log_action("DEBUG", f"🤖 Getting AI response for '{user_message[:50]}...'", user_info)
 
-    if not state.gemini_client:
+    if not state.gemini_pool:
         log_action("WARNING", "❌ Chat client not available, using fallback response", user_info)
         return get_fallback()
 
+    owned = record is None
     try:
-        history = await get_history(user_id)
-        context = ""
-        if history:
-            history_text = [f"{'User' if msg['role'] == 'user' else 'Sakura'}: {msg['content']}" for msg in history]
-            context = f"\n\nPrevious conversation:\n" + "\n".join(history_text)
-
-        final_contents = []
-        if image_bytes:
-            prompt = f"{SAKURA_PROMPT}\n\nUser name: {user_name}{context}\n\nUser sent an image. Caption: '{user_message or 'No caption'}'\n\nDescribe what you see:\n\nSakura's response:"
-            image_data = base64.b64encode(image_bytes).decode('utf-8')
-            final_contents.extend([prompt, {"inline_data": {"mime_type": "image/jpeg", "data": image_data}}])
-        else:
-            prompt = f"{SAKURA_PROMPT}\n\nUser name: {user_name}{context}\nCurrent message: {user_message}\n\nSakura's response:"
-            final_contents.append(prompt)
+        if owned:
+            record = await load_record(user_id)
+        tier = budget_tier(record.tokens_today)
+        if tier == TIER_FALLBACK:
+            log_action("WARNING", "🪙 Daily token budget used up, using fallback response", user_info)
+            return get_fallback()
 
-        response = await state.gemini_client.aio.models.generate_content(
-            model=AI_MODEL,
-            contents=final_contents
-        )
+        history = record.history
+        summary = record.get("summary")
+        committed = record.get("messages")
+        if tier == TIER_REDUCED:
+            log_action("DEBUG", "🪙 Over daily token budget, using short context and budget model", user_info)
+            history, summary_text = fit_history(user_id, history, summary, BUDGET_CONTEXT, committed)
+            model = BUDGET_MODEL
+        else:
+            history, summary_text = fit_history(user_id, history, summary, committed=committed)
+            model = route_model(user_message, image_bytes)
+        contents = build_contents(history, user_name, user_message, image_bytes, summary_text, image_description)
 
-        ai_response = response.text.strip() if response.text else get_fallback()
+        tokens = new_usage()
+        ai_response = await generate(contents, model, on_text, tokens=tokens) or get_fallback()
 
-        await update_history(user_id, user_message, ai_response)
+        if history_message is None:
+            history_message = user_message
+            if image_bytes or image_description:
+                history_message = f"[Image: {user_message}]" if user_message else "[Image sent]"
+        record.stage_turn(history_message, ai_response, turn_id)
+        record.stage_usage(user_info.get("chat_id", user_id), tokens)
+        if owned:
+            await save_record(record)
 
         log_action("INFO", f"✅ AI response generated: '{ai_response[:50]}...'", user_info)
         return ai_response
 
+    except Overloaded as e:
+        log_action("WARNING", f"🚦 Shedding AI request, using fallback response: {e}", user_info)
+        return get_fallback()
     except Exception as e:
         error_message = f"❌ AI API error: {e}"
         log_action("ERROR", error_message, user_info)
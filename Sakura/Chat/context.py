@@ -0,0 +1,136 @@
+import asyncio
+from typing import Optional, Set, Tuple
+from google.genai import types
+from Sakura.Core.config import AI_MODEL, CHAT_LENGTH, CONTEXT_TOKEN_BUDGET, SESSION_TTL
+from Sakura.Core.logging import logger
+from Sakura.Database.valkey import mark_failure
+from Sakura.Database.codec import encode
+from Sakura.Database.pipeline import run
+from Sakura.Services import metrics
+from Sakura.Services.admission import gemini_admission
+from Sakura.Services.resilience import CircuitOpen
+from Sakura.Services.usage import new_usage, record_usage, add_usage
+from Sakura.Chat.pool import gemini_breaker
+from Sakura import state
+
+SUMMARY_PROMPT = """Update the running summary of a chat between a user and Sakura.
+Keep names, facts about the user, their plans, feelings and anything Sakura promised.
+Write at most 5 short sentences in the language the user uses. Reply with the summary only."""
+
+# Turns folded into the summary at once, so a steady chat refreshes it every few messages
+SUMMARY_BATCH = CHAT_LENGTH // 2
+
+_summarizing: Set[int] = set()
+_tasks: Set[asyncio.Task] = set()
+
+# TOKEN-BUDGETED CONTEXT
+# History is fitted into CONTEXT_TOKEN_BUDGET newest turn first, leaving out the turns the
+# per-user running summary already covers. Uncovered turns that no longer fit are folded
+# into the summary by a background task once SUMMARY_BATCH of them pile up, or when the
+# next commit would trim uncovered turns off a full CHAT_LENGTH list, in which case the
+# oldest SUMMARY_BATCH turns are folded ahead. The summary lives in the "summary" field
+# of the user hash together with a mark: the number of messages ever committed up to the
+# newest one it covers. The commit script keeps that count in the "messages" field, so a
+# mark keeps pointing at the same message however the list is trimmed or repeated.
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token)"""
+    return len(text) // 4 + 1
+
+def fit_history(
+    user_id: int,
+    history: list,
+    summary: Optional[dict] = None,
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+    committed: Optional[int] = None
+) -> Tuple[list, Optional[str]]:
+    """
+    Choose the newest turns that fit the context token budget.
+
+    Turns the summary covers are never sent again. Turns left out that it does not
+    cover yet are handed to a background summary refresh in batches.
+
+    Args:
+        user_id: The user the history belongs to.
+        history: The user's full stored history.
+        summary: The stored summary ({"text", "mark"}) if there is one.
+        token_budget: Tokens the history and summary may use together.
+        committed: Messages ever committed for the user ("messages" field), if known.
+
+    Returns:
+        The turns to send and the summary text to send with them.
+    """
+    summary_text = summary["text"] if summary else None
+    budget = token_budget - (estimate_tokens(summary_text) if summary_text else 0)
+
+    # Only the differences between counts matter, so a count started late still works
+    offset = int(committed) - len(history) if committed else None
+    covered = 0
+    if summary and offset is not None and isinstance(summary.get("mark"), int):
+        covered = min(max(summary["mark"] - offset, 0), len(history))
+
+    kept = 0
+    for message in reversed(history[covered:]):
+        cost = estimate_tokens(message["content"])
+        if cost > budget:
+            break
+        budget -= cost
+        kept += 1
+
+    metrics.observe("context_turns", kept)
+    metrics.observe("context_tokens", token_budget - budget)
+
+    dropped = len(history) - kept
+    # Without the count nothing can be marked, so no summary is started
+    if offset is not None:
+        if len(history) >= CHAT_LENGTH and covered < 2:
+            # The next commit trims the two oldest turns, which the summary lacks
+            fold = max(dropped, SUMMARY_BATCH)
+            schedule_summary(user_id, summary_text, history[covered:fold], offset + fold)
+        elif dropped - covered >= SUMMARY_BATCH:
+            schedule_summary(user_id, summary_text, history[covered:dropped], offset + dropped)
+
+    return history[dropped:], summary_text
+
+def schedule_summary(user_id: int, summary: Optional[str], turns: list, mark: int) -> None:
+    """Start a background summary refresh unless one is already running for the user"""
+    if user_id in _summarizing or not state.gemini_pool or not state.valkey_client:
+        return
+    # Summaries can wait for the next message, they never queue behind replies
+    if not gemini_admission.try_acquire():
+        return
+    _summarizing.add(user_id)
+    task = asyncio.create_task(refresh_summary(user_id, summary, turns, mark))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+async def refresh_summary(user_id: int, summary: Optional[str], turns: list, mark: int) -> None:
+    """Fold turns into the user's running summary and store it with the mark of the last one"""
+    try:
+        transcript = "\n".join(f"{'User' if msg['role'] == 'user' else 'Sakura'}: {msg['content']}" for msg in turns)
+        response = await gemini_breaker.call(lambda: state.gemini_pool.call(lambda key: key.client.aio.models.generate_content(
+            model=AI_MODEL,
+            contents=f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}",
+            config=types.GenerateContentConfig(system_instruction=SUMMARY_PROMPT, max_output_tokens=256)
+        )), retries=0)
+        tokens = new_usage()
+        record_usage(response.usage_metadata, tokens)
+        await add_usage(user_id, None, tokens)
+        if not response.text:
+            return
+
+        value = {"text": response.text.strip(), "mark": mark}
+        key = f"user:{user_id}"
+        await asyncio.gather(
+            run("HSET", key, "summary", encode(value)),
+            run("EXPIRE", key, SESSION_TTL)
+        )
+        metrics.increment("summary_refreshes")
+        logger.debug(f"📝 Refreshed conversation summary for user {user_id} ({len(turns)} messages folded)")
+    except CircuitOpen:
+        logger.debug(f"🔌 Gemini breaker open, summary refresh for user {user_id} postponed")
+    except Exception as e:
+        mark_failure(e)
+        logger.error(f"❌ Failed to refresh summary for user {user_id}: {e}")
+    finally:
+        _summarizing.discard(user_id)
+        gemini_admission.release()
@@ -1,11 +1,12 @@
 import random
 from pyrogram import Client
 from pyrogram.types import Message
-from Sakura.Core.helpers import log_action
+from Sakura.Core.helpers import log_action, get_turn
 from Sakura.Modules.reactions import CONTEXTUAL_REACTIONS
 from Sakura.Modules.effects import animate_reaction
 from Sakura.Modules.typing import send_typing
 from Sakura.Chat.response import get_response
+from Sakura.Chat.media import describe_image
 from Sakura import state
 
 IMAGE_ANALYSIS_TRIGGERS = [
@@ -48,18 +49,19 @@ async def reply_image(client: Client, message: Message, user_message: str, user_
         await send_typing(client, message.chat.id, user_info)
 
         try:
-            photo = message.reply_to_message.photo
-            image_stream = await client.download_media(photo.file_id, in_memory=True)
-            image_bytes = image_stream.getvalue()
+            description = await describe_image(client, message.reply_to_message.photo)
+            if not description:
+                await message.reply_text("Image analyze nahi kar paa rahi 😔")
+                return True
 
             caption = message.reply_to_message.caption or ""
 
             response = await get_response(
                 user_message=caption,
                 user_id=user_info["user_id"],
-                user_name=user_info.get("first_name", "User"),
                 user_info=user_info,
-                image_bytes=image_bytes
+                turn_id=get_turn(message),
+                image_description=description
             )
 
             await message.reply_text(response)
@@ -73,8 +75,8 @@ async def reply_image(client: Client, message: Message, user_message: str, user_
             await message.reply_text(error_response)
             return True
 
-    if user_info["user_id"] in state.conversation_history:
-        history = state.conversation_history[user_info["user_id"]]
+    history = state.conversation_history.get(user_info["user_id"])
+    if history:
         for msg in reversed(history):
             if msg["role"] == "user" and "[Image:" in msg["content"]:
                 log_action("INFO", "🔍 User asking about previously sent image from history", user_info)
@@ -0,0 +1,105 @@
+import asyncio
+import io
+import time
+from typing import Optional, Tuple
+from google.genai import types
+from pyrogram import Client
+from pyrogram.types import Photo
+from Sakura.Core.config import IMAGE_CACHE_TTL, VISION_MODEL, IMAGE_MIN_SIDE, IMAGE_MAX_SIDE, IMAGE_MAX_BYTES
+from Sakura.Core.logging import logger
+from Sakura.Database.cache import get_or_load
+from Sakura.Chat.chat import generate
+from Sakura.Services import metrics
+from Sakura.Services.usage import new_usage, add_usage
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DESCRIBE_CONFIG = types.GenerateContentConfig(
+    system_instruction="Describe the image neutrally for someone who cannot see it: main subjects, "
+                       "any visible text verbatim, setting and mood. At most 80 words.",
+    max_output_tokens=200
+)
+
+# IMAGE INGESTION
+# Telegram keeps several sizes of every photo. The smallest one that is still at least
+# IMAGE_MIN_SIDE on its long side is downloaded instead of the original (or the largest
+# one if none is). Anything larger than IMAGE_MAX_SIDE or IMAGE_MAX_BYTES is downscaled
+# and re-encoded with Pillow (when installed) in a worker thread, so the event loop
+# never touches the pixels.
+def pick_variant(photo: Photo) -> Tuple[str, int, int]:
+    """Choose which size of a photo to download, returns (file_id, long side, file size)"""
+    variants = [(max(thumb.width, thumb.height), thumb.file_size or 0, thumb.file_id) for thumb in photo.thumbs or []]
+    variants.append((max(photo.width, photo.height), photo.file_size or 0, photo.file_id))
+    variants.sort()
+
+    # Bytes are capped by _shrink, so a large file never forces the original
+    adequate = [variant for variant in variants if variant[0] >= IMAGE_MIN_SIDE]
+    side, size, file_id = adequate[0] if adequate else variants[-1]
+    return file_id, side, size
+
+def _shrink(image_bytes: bytes) -> bytes:
+    """Downscale to IMAGE_MAX_SIDE and re-encode as JPEG (runs in a worker thread)"""
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        # JPEGs are decoded straight at a reduced scale instead of at full resolution
+        image.draft("RGB", (IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
+        image.thumbnail((IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
+        output = io.BytesIO()
+        image.convert("RGB").save(output, format="JPEG", quality=85)
+        return output.getvalue()
+
+async def ingest_image(client: Client, photo: Photo) -> bytes:
+    """Download the best fitting size of a photo, shrinking it if it is still too large"""
+    file_id, side, size = pick_variant(photo)
+    image_file = await client.download_media(file_id, in_memory=True)
+    image_bytes = image_file.getvalue()
+    metrics.increment("image_bytes_skipped", max(0, (photo.file_size or 0) - len(image_bytes)))
+
+    if Image and (side > IMAGE_MAX_SIDE or len(image_bytes) > IMAGE_MAX_BYTES):
+        started = time.perf_counter()
+        shrunk = await asyncio.to_thread(_shrink, image_bytes)
+        metrics.observe("image_shrink_time", time.perf_counter() - started)
+        if len(shrunk) < len(image_bytes):
+            image_bytes = shrunk
+            metrics.increment("image_shrinks")
+
+    metrics.observe("image_ingest_bytes", len(image_bytes))
+    logger.debug(f"📥 Image {photo.file_unique_id} ingested: {side}px variant, {len(image_bytes)} bytes")
+    return image_bytes
+
+# IMAGE DESCRIPTION CACHE
+# Telegram gives every file a file_unique_id that is the same for every copy of it, in
+# any chat. The neutral description of an image is cached under that id, so reposts and
+# follow-up questions reuse the text instead of downloading and uploading the pixels
+# again. Concurrent requests for the same file share one download and one analysis.
+async def describe_image(client: Client, photo: Photo) -> Optional[str]:
+    """Get the cached neutral description of a photo, analyzing it on a miss"""
+    loaded = False
+
+    async def load() -> Optional[str]:
+        nonlocal loaded
+        loaded = True
+        image_bytes = await ingest_image(client, photo)
+        tokens = new_usage()
+        description = await generate(
+            [types.Content(role="user", parts=[
+                types.Part.from_text(text="Describe this image."),
+                types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg")
+            ])],
+            model=VISION_MODEL,
+            config=DESCRIBE_CONFIG,
+            tokens=tokens
+        )
+        # Shared by every copy of the image, so it only counts towards the daily totals
+        await add_usage(None, None, tokens)
+        return description or None
+
+    description = await get_or_load(f"image:{photo.file_unique_id}", load, IMAGE_CACHE_TTL)
+    if loaded:
+        metrics.increment("image_cache_misses")
+    else:
+        metrics.increment("image_cache_hits")
+        metrics.increment("image_bytes_saved", photo.file_size or 0)
+    return description
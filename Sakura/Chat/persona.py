@@ -0,0 +1,116 @@
+import asyncio
+from google.genai import errors, types
+from Sakura.Core.config import AI_MODEL, PERSONA_CACHE, PERSONA_CACHE_TTL
+from Sakura.Core.logging import logger
+from Sakura.Chat.prompts import SAKURA_PROMPT
+from Sakura.Chat.pool import GeminiKey
+from Sakura.Services import metrics
+from Sakura import state
+
+# Statuses Gemini answers with when referenced cached content expired or was deleted
+CACHE_REJECTED = ("NOT_FOUND", "INVALID_ARGUMENT", "PERMISSION_DENIED")
+
+# PERSONA CACHE
+# SAKURA_PROMPT is stored once per API key as explicitly cached content and every request
+# only references it by name. The cache TTL is extended well before it runs out. When the
+# cache cannot be created (model or prompt size not eligible) the persona is sent as a
+# system instruction instead, which still keeps it as the identical leading prefix.
+# A request rejected because its key's cache is gone drops that key's cache and
+# recreates it immediately, the other keys keep theirs.
+def generation_config(key: GeminiKey, model: str = AI_MODEL) -> types.GenerateContentConfig:
+    """Config that attaches the Sakura persona to a request on the given key and model"""
+    # Cached content belongs to the model it was created for
+    if key.persona_cache and model == AI_MODEL:
+        return types.GenerateContentConfig(cached_content=key.persona_cache)
+    return types.GenerateContentConfig(system_instruction=SAKURA_PROMPT)
+
+def is_cache_rejected(config: types.GenerateContentConfig, error: Exception) -> bool:
+    """Whether a request failed because the cached content it referenced is gone or invalid"""
+    return (
+        bool(config.cached_content)
+        and isinstance(error, errors.APIError)
+        and error.status in CACHE_REJECTED
+        and "cachedcontent" in (error.message or "").lower().replace(" ", "")
+    )
+
+def reject_persona_cache(key: GeminiKey, config: types.GenerateContentConfig, error: Exception) -> None:
+    """Stop referencing a key's persona cache the API rejected and recreate it right away"""
+    if not is_cache_rejected(config, error) or key.persona_cache != config.cached_content:
+        return
+    logger.warning(f"⚠️ Persona cache on key #{key.index} was rejected, sending the persona inline until it is recreated")
+    metrics.increment("persona_cache_rejects")
+    key.persona_cache = None
+    asyncio.create_task(_replace_cache(key, config.cached_content))
+
+def persona_cached() -> bool:
+    """Whether any key currently has the persona cached"""
+    return bool(state.gemini_pool) and any(key.persona_cache for key in state.gemini_pool.keys)
+
+async def _create_cache(key: GeminiKey) -> None:
+    cache = await key.client.aio.caches.create(
+        model=AI_MODEL,
+        config=types.CreateCachedContentConfig(
+            display_name="sakura-persona",
+            system_instruction=SAKURA_PROMPT,
+            ttl=f"{PERSONA_CACHE_TTL}s"
+        )
+    )
+    key.persona_cache = cache.name
+    metrics.increment("persona_cache_creates")
+    logger.info(f"🧠 Persona cached as {cache.name} on key #{key.index} for {PERSONA_CACHE_TTL}s")
+
+async def _extend_cache(key: GeminiKey) -> None:
+    await key.client.aio.caches.update(
+        name=key.persona_cache,
+        config=types.UpdateCachedContentConfig(ttl=f"{PERSONA_CACHE_TTL}s")
+    )
+    metrics.increment("persona_cache_refreshes")
+    logger.debug(f"🧠 Persona cache {key.persona_cache} extended for {PERSONA_CACHE_TTL}s")
+
+async def _replace_cache(key: GeminiKey, stale: str) -> None:
+    try:
+        await key.client.aio.caches.delete(name=stale)
+    except Exception as e:
+        logger.debug(f"🧠 Stale persona cache {stale} could not be deleted: {e}")
+    await _refresh_key(key)
+
+async def _refresh_key(key: GeminiKey) -> None:
+    try:
+        if key.persona_cache:
+            try:
+                await _extend_cache(key)
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ Persona cache on key #{key.index} could not be extended, recreating: {e}")
+                key.persona_cache = None
+        await _create_cache(key)
+    except Exception as e:
+        logger.warning(f"⚠️ Persona cache unavailable on key #{key.index}, using system instruction instead: {e}")
+
+async def refresh_persona() -> None:
+    """Keep the persona cache of every key alive, refreshing it at half its TTL"""
+    if not PERSONA_CACHE or not state.gemini_pool:
+        return
+
+    logger.info("🧠 Persona cache task started")
+    while True:
+        try:
+            await asyncio.gather(*[_refresh_key(key) for key in state.gemini_pool.keys])
+            await asyncio.sleep(PERSONA_CACHE_TTL / 2)
+        except asyncio.CancelledError:
+            logger.info("🧠 Persona cache task stopped")
+            break
+
+async def delete_persona_cache() -> None:
+    """Delete the persona caches on shutdown"""
+    if not state.gemini_pool:
+        return
+    for key in state.gemini_pool.keys:
+        if not key.persona_cache:
+            continue
+        try:
+            await key.client.aio.caches.delete(name=key.persona_cache)
+            logger.info(f"✅ Persona cache on key #{key.index} deleted")
+        except Exception as e:
+            logger.error(f"❌ Failed to delete persona cache on key #{key.index}: {e}")
+        key.persona_cache = None
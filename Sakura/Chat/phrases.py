@@ -0,0 +1,105 @@
+import random
+import re
+import sys
+from typing import Dict, List, Optional
+import orjson
+from Sakura.Core.config import FAST_PATH, PHRASE_POOL_PATH
+from Sakura.Core.logging import logger
+from Sakura.Services import metrics
+
+# Only messages this short are looked up at all
+MAX_PHRASE_LENGTH = 40
+POOL_SIZE = 30
+
+# Curated openers, grouped by intent
+HOT_PHRASES: Dict[str, List[str]] = {
+    "greeting": ["hi", "hii", "hello", "hey", "hlo", "heyy", "hi sakura", "hello sakura", "hey sakura", "namaste"],
+    "how": ["kaise ho", "kaisi ho", "how are you", "hru", "how r u", "kaisi hai", "kya haal hai"],
+    "doing": ["kya kar rahi ho", "kya kr rhi ho", "kya kar rhi ho", "wyd", "what are you doing", "kya chal raha hai"],
+    "morning": ["good morning", "gm", "gud morning", "morning"],
+    "night": ["good night", "gn", "gud night", "shubh ratri", "night"],
+    "thanks": ["thanks", "thank you", "ty", "shukriya", "dhanyawad", "thanku"],
+    "bye": ["bye", "byee", "tata", "see you", "chalo bye", "alvida"],
+}
+
+# Built-in replies, replaced by the pool file written by the batch job below
+DEFAULT_POOL: Dict[str, List[str]] = {
+    "greeting": ["Hi 🌸 kaise ho?", "Hello ji 💕 bolo kya haal hai?", "Heyy 🌸 aaj kaisa din raha?"],
+    "how": ["Main theek hoon 🌸 tum batao?", "Acchi hoon 💕 tumhara din kaisa tha?"],
+    "doing": ["Bas tumse baat kar rahi hoon 🌸", "Kuch khaas nahi 💕 tum batao kya chal raha hai?"],
+    "morning": ["Good morning 🌸 aaj ka din accha jaye", "Good morning 💕 chai pi li?"],
+    "night": ["Good night 🌸 sweet dreams", "Good night 💕 araam se sona"],
+    "thanks": ["Koi baat nahi 🌸", "Anytime 💕"],
+    "bye": ["Bye 🌸 apna khayal rakhna", "Tata 💕 jaldi milte hain"],
+}
+
+# HOT-PHRASE FAST PATH
+# Short openers are normalized (case, punctuation, emoji, stretched letters) and looked
+# up in HOT_PHRASES. A match is answered from a pool of persona-style replies without
+# calling Gemini. The pool is generated offline by `python -m Sakura.Chat.phrases`.
+def normalize(text: str) -> str:
+    """Lowercase, drop everything but letters, digits and spaces, squeeze stretched letters"""
+    text = re.sub(r"[^\w\s]", " ", text.casefold())
+    text = re.sub(r"(\w)\1{2,}", r"\1\1", text)
+    return " ".join(text.split())
+
+_lookup = {normalize(phrase): intent for intent, phrases in HOT_PHRASES.items() for phrase in phrases}
+_pool = DEFAULT_POOL
+
+def load_pool(path: str = PHRASE_POOL_PATH) -> bool:
+    """Load the pre-generated reply pool, keeping the built-in replies for missing intents"""
+    global _pool
+    if not path:
+        return False
+    try:
+        with open(path, "rb") as f:
+            pool = orjson.loads(f.read())
+        _pool = {intent: pool.get(intent) or replies for intent, replies in DEFAULT_POOL.items()}
+        logger.info(f"💬 Loaded hot-phrase reply pool from {path}")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Failed to load hot-phrase reply pool from {path}: {e}")
+        return False
+
+def quick_reply(user_message: str) -> Optional[str]:
+    """A pooled reply for a hot phrase, or None when the message needs the AI"""
+    if not FAST_PATH or len(user_message) > MAX_PHRASE_LENGTH:
+        return None
+    intent = _lookup.get(normalize(user_message))
+    if not intent:
+        metrics.increment("fast_path_misses")
+        return None
+    metrics.increment("fast_path_hits")
+    return random.choice(_pool[intent])
+
+load_pool()
+
+
+async def _generate_pool(output_path: str) -> None:
+    """Generate POOL_SIZE persona replies per intent with Gemini and write the pool file"""
+    from Sakura.Chat.chat import init_client, complete_text
+    from Sakura.Core.config import AI_MODEL
+    from Sakura import state
+
+    init_client()
+    if not state.gemini_pool:
+        return
+
+    pool = {}
+    for intent, phrases in HOT_PHRASES.items():
+        text = await complete_text(AI_MODEL, (
+            f"Write {POOL_SIZE} different replies Sakura could send to a user who just said one of: "
+            f"{', '.join(phrases)}. One reply per line, no numbering."
+        ))
+        replies = [line.strip() for line in text.splitlines() if line.strip()]
+        pool[intent] = replies or DEFAULT_POOL[intent]
+        logger.info(f"💬 Generated {len(replies)} replies for '{intent}'")
+
+    with open(output_path, "wb") as f:
+        f.write(orjson.dumps(pool, option=orjson.OPT_INDENT_2))
+    logger.info(f"✅ Wrote hot-phrase reply pool -> {output_path}")
+
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(_generate_pool(sys.argv[1] if len(sys.argv) > 1 else "phrases.json"))
@@ -1,13 +1,23 @@
+import hashlib
 import random
-from typing import Dict
+from typing import Dict, Optional
+import orjson
+from google.genai import types
 from pyrogram import Client
 from pyrogram.types import Message
-from Sakura.Core.helpers import log_action
+from Sakura.Core.config import POLL_CACHE_TTL
+from Sakura.Core.helpers import log_action, get_turn, get_fallback
+from Sakura.Database.cache import get_or_load
+from Sakura.Database.conversation import commit_turn
 from Sakura.Modules.effects import animate_reaction
 from Sakura.Modules.reactions import CONTEXTUAL_REACTIONS
 from Sakura.Modules.typing import send_typing
-from Sakura.Database.conversation import add_history
-from Sakura.Chat.chat import get_response
+from Sakura.Modules.messages import POLL_ANSWERS
+from Sakura.Chat.chat import generate
+from Sakura.Services import metrics
+from Sakura.Services.admission import Overloaded
+from Sakura.Services.usage import new_usage, add_usage
+from Sakura import state
 
 POLL_ANALYSIS_TRIGGERS = [
     "poll", "polls", "question", "questions", "query", "queries", "quiz", "quiz question",
@@ -20,6 +30,17 @@ POLL_ANALYSIS_TRIGGERS = [
     "kaunsa galat", "kaunsa option", "kaunsa choice"
 ]
 
+POLL_CONFIG = types.GenerateContentConfig(
+    system_instruction="You answer multiple-choice questions. Give the exact text of the correct option "
+                       "and a reason of at most 15 words in the language of the question.",
+    response_mime_type="application/json",
+    response_schema={
+        "type": "OBJECT",
+        "properties": {"answer": {"type": "STRING"}, "reason": {"type": "STRING"}},
+        "required": ["answer", "reason"]
+    }
+)
+
 async def reply_poll(client: Client, message: Message, user_message: str, user_info: dict) -> bool:
     """Check if user is asking to analyze a previously sent poll and handle it"""
     message_lower = user_message.lower()
@@ -59,7 +80,7 @@ async def reply_poll(client: Client, message: Message, user_message: str, user_i
             poll_options = [option.text.encode('utf-8', 'ignore').decode('utf-8') for option in poll.options]
 
             response = await analyze_poll(
-                poll_question, poll_options, user_info, user_info["user_id"]
+                poll_question, poll_options, user_info, user_info["user_id"], get_turn(message)
             )
             await message.reply_text(response)
             log_action("INFO", "✅ Referenced poll analyzed successfully", user_info)
@@ -71,41 +92,75 @@ async def reply_poll(client: Client, message: Message, user_message: str, user_i
             return True
     return False
 
-async def analyze_poll(poll_question: str, poll_options: list, user_info: Dict[str, any], user_id: int) -> str:
-    """Analyzes a poll using the unified chat AI."""
+def poll_key(poll_question: str, poll_options: list) -> str:
+    """Cache key for a poll, the same for any copy of it whatever the option order"""
+    options = sorted(normalize(option) for option in poll_options)
+    digest = hashlib.sha1("\x1f".join([normalize(poll_question), *options]).encode("utf-8")).hexdigest()
+    return f"poll:{digest}"
+
+def normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+async def solve_poll(poll_question: str, poll_options: list) -> Optional[dict]:
+    """Ask Gemini for the neutral answer to a poll (no persona)"""
+    options_text = "\n".join(f"- {option}" for option in poll_options)
+    tokens = new_usage()
+    text = await generate(
+        f"Question: {poll_question}\n\nOptions:\n{options_text}",
+        config=POLL_CONFIG,
+        tokens=tokens
+    )
+    # One answer serves every copy of the poll, so it only counts towards the daily totals
+    await add_usage(None, None, tokens)
+    if not text:
+        return None
+    answer = orjson.loads(text)
+    return {"answer": answer["answer"], "reason": answer.get("reason", "")}
+
+def render_answer(answer: dict, poll_options: list) -> str:
+    """Turn a cached neutral answer into a Sakura style reply for this copy of the poll"""
+    option = answer["answer"]
+    for index, text in enumerate(poll_options):
+        if normalize(text) == normalize(option):
+            option = f"{index + 1}. {text}"
+            break
+    return random.choice(POLL_ANSWERS).format(option=option, reason=answer["reason"]).strip()
+
+async def analyze_poll(poll_question: str, poll_options: list, user_info: Dict[str, any], user_id: int, turn_id: str = None) -> str:
+    """
+    Answers a poll, sharing one cached analysis between every copy of the same poll.
+
+    Only the neutral answer is cached, the reply is rendered from persona templates
+    and committed to the user's history.
+    """
     if user_info:
         log_action("DEBUG", f"📊 Analyzing poll: '{poll_question[:50]}...'", user_info)
 
-    try:
-        options_text = "\n".join([f"{i + 1}. {option}" for i, option in enumerate(poll_options)])
-
-        poll_prompt_message = f"""User has sent a poll or asked about a poll question. Analyze this question and suggest which option might be the correct answer.
-
-Poll Question: "{poll_question}"
+    if not state.gemini_pool:
+        return get_fallback()
 
-Options:
-{options_text}
-
-Analyze this poll question and respond in Sakura's style about which option you think is correct and why. Keep it to one or two lines as per your character rules. Be helpful and give a quick reason.
-
-Sakura's response:"""
+    try:
+        loaded = False
 
-        response = await get_response(
-            user_message=poll_prompt_message,
-            user_id=user_id,
-            user_info=user_info
-        )
+        async def load() -> Optional[dict]:
+            nonlocal loaded
+            loaded = True
+            return await solve_poll(poll_question, poll_options)
 
-        if response:
-            poll_description = f"[Poll: {poll_question}] Options: {', '.join(poll_options)}"
-            await add_history(user_id, poll_description, is_user=True)
-            await add_history(user_id, response, is_user=False)
-            log_action("INFO", "✅ Poll analysis completed and saved to history", user_info)
-            return response
-        else:
+        answer = await get_or_load(poll_key(poll_question, poll_options), load, POLL_CACHE_TTL)
+        metrics.increment("poll_cache_misses" if loaded else "poll_cache_hits")
+        if not answer:
             return "Poll analyze nahi kar paa rahi 😕"
 
+        response = render_answer(answer, poll_options)
+        poll_description = f"[Poll: {poll_question}] Options: {', '.join(poll_options)}"
+        await commit_turn(user_id, poll_description, response, turn_id)
+        log_action("INFO", f"✅ Poll analysis {'generated' if loaded else 'served from cache'} and saved to history", user_info)
+        return response
+
+    except Overloaded:
+        return get_fallback()
     except Exception as e:
         if user_info:
             log_action("ERROR", f"❌ Poll analysis error: {e}", user_info)
-        return "Poll analyze nahi kar paa rahi 😕"
\ No newline at end of file
+        return "Poll analyze nahi kar paa rahi 😕"
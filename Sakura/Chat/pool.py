@@ -0,0 +1,132 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, List, Optional
+from google import genai
+from google.genai import errors
+from Sakura.Core.config import GEMINI_BACKOFF_MAX, GEMINI_KEY_SYNC, GEMINI_TIMEOUT, GEMINI_SLOW_CALL
+from Sakura.Core.logging import logger
+from Sakura.Database.keys import get_key, set_key
+from Sakura.Services import metrics
+from Sakura.Services.resilience import CircuitBreaker
+
+class GeminiKey:
+    """One API key with its client and health"""
+
+    def __init__(self, index: int, api_key: str):
+        self.index = index
+        self.client = genai.Client(api_key=api_key)
+        self.inflight = 0
+        self.failures = 0
+        self.cooldown_until = 0.0
+        self.persona_cache: Optional[str] = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.cooldown_until <= time.monotonic()
+
+    def rate_limited(self, delay: Optional[float]) -> float:
+        """Put the key on cooldown with exponential backoff, returns the cooldown"""
+        self.failures += 1
+        backoff = min(60.0, 2.0 ** self.failures) * random.uniform(0.8, 1.2)
+        cooldown = max(delay or 0.0, backoff)
+        self.cooldown_until = time.monotonic() + cooldown
+        return cooldown
+
+
+def retry_delay(error: errors.APIError) -> Optional[float]:
+    """Read the RetryInfo delay from a Gemini error, if the API sent one"""
+    try:
+        for detail in error.details["error"].get("details", []):
+            if "retryDelay" in detail:
+                return float(detail["retryDelay"].rstrip("s"))
+    except Exception:
+        pass
+    return None
+
+def is_quota_error(error: Exception) -> bool:
+    return isinstance(error, errors.APIError) and (error.code == 429 or error.status == "RESOURCE_EXHAUSTED")
+
+# Quota errors count against the breaker but are retried across keys by the pool
+gemini_breaker = CircuitBreaker("gemini_api", GEMINI_TIMEOUT, slow_call=GEMINI_SLOW_CALL)
+
+
+# GEMINI CLIENT POOL
+# Requests go to the healthy key with the fewest requests in flight, starting from the
+# active index shared through Database/keys.py. A quota error puts the key on backoff,
+# moves the shared index on and retries on the next key, so throughput adds up across
+# keys instead of stalling at one key's limit.
+class ClientPool:
+    """Set of Gemini clients, one per API key"""
+
+    def __init__(self, api_keys: List[str]):
+        self.keys = [GeminiKey(index, api_key) for index, api_key in enumerate(api_keys)]
+        self.active = 0
+        self.synced_at = 0.0
+
+    async def _sync(self) -> None:
+        """Refresh the active index from Valkey every GEMINI_KEY_SYNC seconds"""
+        if len(self.keys) < 2 or time.monotonic() - self.synced_at < GEMINI_KEY_SYNC:
+            return
+        self.synced_at = time.monotonic()
+        self.active = await get_key() % len(self.keys)
+
+    def pick(self) -> GeminiKey:
+        """The least loaded healthy key, or the one that recovers first"""
+        ordered = self.keys[self.active:] + self.keys[:self.active]
+        healthy = [key for key in ordered if key.healthy]
+        if healthy:
+            return min(healthy, key=lambda key: key.inflight)
+        return min(ordered, key=lambda key: key.cooldown_until)
+
+    async def call(self, request: Callable[[GeminiKey], Awaitable[any]]) -> any:
+        """
+        Run a request on a pooled key, failing over to other keys on quota errors.
+
+        Args:
+            request: Coroutine function taking the chosen GeminiKey.
+
+        Returns:
+            Whatever the request returns.
+        """
+        await self._sync()
+        last_error = None
+        for _ in range(len(self.keys) + 1):
+            key = self.pick()
+            wait = key.cooldown_until - time.monotonic()
+            if wait > 0:
+                if wait > GEMINI_BACKOFF_MAX:
+                    break
+                await asyncio.sleep(wait)
+
+            key.inflight += 1
+            metrics.increment(f"gemini_key{key.index}_requests")
+            try:
+                result = await request(key)
+                key.failures = 0
+                return result
+            except Exception as e:
+                if not is_quota_error(e):
+                    raise
+                last_error = e
+                cooldown = key.rate_limited(retry_delay(e))
+                metrics.increment("gemini_rate_limited")
+                logger.warning(f"⚠️ Gemini key #{key.index} hit its quota, cooling down for {cooldown:.0f}s")
+                await self._fail_over(key)
+            finally:
+                key.inflight -= 1
+
+        metrics.increment("gemini_pool_exhausted")
+        raise last_error or RuntimeError("All Gemini keys are cooling down")
+
+    async def _fail_over(self, key: GeminiKey) -> None:
+        """Move the shared active index past a rate limited key"""
+        if len(self.keys) < 2 or self.active != key.index:
+            return
+        self.active = (key.index + 1) % len(self.keys)
+        metrics.increment("gemini_failovers")
+        await set_key(self.active)
+
+    @property
+    def healthy_count(self) -> int:
+        return sum(1 for key in self.keys if key.healthy)
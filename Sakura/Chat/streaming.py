@@ -0,0 +1,68 @@
+import asyncio
+import time
+from typing import Optional
+from pyrogram.types import Message
+from pyrogram.errors import FloodWait, MessageNotModified
+from Sakura.Core.config import STREAM_EDIT_INTERVAL
+from Sakura.Core.logging import logger
+from Sakura.Services import metrics
+
+# Telegram rejects messages longer than this
+MESSAGE_LIMIT = 4096
+
+class StreamReply:
+    """
+    Progressively shows a streamed response as one Telegram reply.
+
+    The first text is sent as soon as it arrives, later text is applied by editing
+    the reply at most once every STREAM_EDIT_INTERVAL seconds (longer after a
+    FloodWait). finish() applies the final text.
+    """
+
+    def __init__(self, message: Message, started: Optional[float] = None):
+        self.message = message
+        self.started = started or time.perf_counter()
+        self.reply = None
+        self.shown = ""
+        self.next_edit = 0.0
+
+    async def update(self, text: str) -> None:
+        """Show the text received so far, throttled to Telegram's edit limits"""
+        text = text.strip()[:MESSAGE_LIMIT]
+        if not text or text == self.shown:
+            return
+
+        if self.reply is None:
+            self.reply = await self.message.reply_text(text)
+            self.shown = text
+            self.next_edit = time.monotonic() + STREAM_EDIT_INTERVAL
+            metrics.observe("ttft_stream", time.perf_counter() - self.started)
+            return
+
+        if time.monotonic() >= self.next_edit:
+            await self._edit(text)
+
+    async def finish(self, text: str) -> None:
+        """Show the complete response, sending it if nothing was shown yet"""
+        text = text.strip()[:MESSAGE_LIMIT]
+        if self.reply is None:
+            await self.update(text)
+            return
+        if text != self.shown:
+            delay = self.next_edit - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self._edit(text)
+
+    async def _edit(self, text: str) -> None:
+        try:
+            await self.reply.edit_text(text)
+            self.shown = text
+            metrics.increment("stream_edits")
+            self.next_edit = time.monotonic() + STREAM_EDIT_INTERVAL
+        except MessageNotModified:
+            self.shown = text
+        except FloodWait as e:
+            logger.warning(f"⚠️ Stream edit hit FloodWait, backing off {e.value}s")
+            metrics.increment("stream_flood_waits")
+            self.next_edit = time.monotonic() + e.value
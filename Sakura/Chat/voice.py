@@ -1,11 +1,27 @@
 import asyncio
 from elevenlabs.client import AsyncElevenLabs
 from elevenlabs.core import ApiError
-from Sakura.Core.config import ELEVENLABS_API_KEY, VOICE_ID
+from Sakura.Core.config import ELEVENLABS_API_KEY, VOICE_ID, ELEVENLABS_TIMEOUT
 from Sakura.Core.logging import logger
+from Sakura.Services.resilience import CircuitBreaker, CircuitOpen
 
 client = AsyncElevenLabs(api_key=ELEVENLABS_API_KEY)
 
+voice_breaker = CircuitBreaker("elevenlabs", ELEVENLABS_TIMEOUT)
+
+async def synthesize(text: str) -> bytes:
+    """Convert text to speech in one ElevenLabs call"""
+    audio_stream = client.text_to_speech.convert(
+        text=text,
+        voice_id=VOICE_ID,
+        model_id="eleven_v3"
+    )
+
+    audio_bytes = b""
+    async for chunk in audio_stream:
+        audio_bytes += chunk
+    return audio_bytes
+
 async def generate_voice(text: str) -> bytes | None:
     """
     Generates voice from text using the ElevenLabs API.
@@ -14,7 +30,8 @@ async def generate_voice(text: str) -> bytes | None:
         text: The text to convert to speech.
 
     Returns:
-        The audio data in bytes, or None if an error occurred.
+        The audio data in bytes, or None if an error occurred or the ElevenLabs
+        breaker is open (callers then send the text instead).
     """
     if not ELEVENLABS_API_KEY:
         logger.warning("ElevenLabs API key is not configured.")
@@ -22,19 +39,16 @@ async def generate_voice(text: str) -> bytes | None:
 
     try:
         logger.info(f"Generating voice for text: '{text[:30]}...'")
-        audio_stream = client.text_to_speech.convert(
-            text=text,
-            voice_id=VOICE_ID,
-            model_id="eleven_v3"
-        )
-
-        audio_bytes = b""
-        async for chunk in audio_stream:
-            audio_bytes += chunk
-
+        audio_bytes = await voice_breaker.call(lambda: synthesize(text))
         logger.info("Voice generation successful.")
         return audio_bytes
 
+    except CircuitOpen:
+        logger.warning("🔌 ElevenLabs breaker open, replying with text instead of voice")
+        return None
+    except asyncio.TimeoutError:
+        logger.error(f"ElevenLabs did not answer within {ELEVENLABS_TIMEOUT:.0f}s")
+        return None
     except ApiError as e:
         logger.error(f"ElevenLabs API error: {e}")
         return None
@@ -7,19 +7,73 @@ BOT_TOKEN = os.getenv("BOT_TOKEN", "")
 VALKEY_URL = os.getenv("VALKEY_URL", "")
 DATABASE_URL = os.getenv("DATABASE_URL", "")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
+GEMINI_API_KEYS = [key.strip() for key in os.getenv("GEMINI_API_KEYS", GEMINI_API_KEY).split(",") if key.strip()]
+GEMINI_BACKOFF_MAX = 5.0
+GEMINI_KEY_SYNC = 5
 AI_MODEL = os.getenv("AI_MODEL", "gemini-2.5-flash-lite")
+FAST_MODEL = os.getenv("FAST_MODEL", AI_MODEL)
+VISION_MODEL = os.getenv("VISION_MODEL", AI_MODEL)
+FAST_MAX_CHARS = 60
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "false").lower() == "true"
+HEDGE_MODEL = os.getenv("HEDGE_MODEL", "")
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_DELAY = 1.0
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() == "true"
+STREAM_EDIT_INTERVAL = 1.5
+PERSONA_CACHE = os.getenv("PERSONA_CACHE", "true").lower() == "true"
+PERSONA_CACHE_TTL = 3600
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "32"))
+GEMINI_QUEUE_SIZE = int(os.getenv("GEMINI_QUEUE_SIZE", "64"))
+GEMINI_QUEUE_TIMEOUT = 10.0
+GEMINI_TIMEOUT = 30.0
+GEMINI_SLOW_CALL = 20.0
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY", "")
 VOICE_ID = "ClQWBz2oM8pZtT7nQKk9"
+ELEVENLABS_TIMEOUT = 20.0
+BOT_API_TIMEOUT = 10.0
+BREAKER_WINDOW = 20
+BREAKER_MIN_CALLS = 5
+BREAKER_FAILURE_RATE = 0.5
+BREAKER_COOLDOWN = 30.0
+RETRY_BASE_DELAY = 0.5
 OWNER_ID = int(os.getenv("OWNER_ID", "0"))
 SUPPORT_LINK = os.getenv("SUPPORT_LINK", "https://t.me/SoulMeetsHQ")
 UPDATE_LINK = os.getenv("UPDATE_LINK", "https://t.me/DoDotPy")
 PING_LINK = os.getenv("PING_LINK", "https://t.me/DoDotPy")
 SESSION_TTL = 3600
 CACHE_TTL = 300
+CACHE_L1_SIZE = 2048
+CACHE_L1_TTL = 60
+POLL_CACHE_TTL = 86400
+IMAGE_CACHE_TTL = 86400
+IMAGE_MIN_SIDE = 768
+IMAGE_MAX_SIDE = 1280
+IMAGE_MAX_BYTES = 1024 * 1024
+VALKEY_FAILURE_THRESHOLD = 3
+VALKEY_FAILURE_WINDOW = 30
+VALKEY_PROBE_INTERVAL = 5
+ZSTD_DICT_PATH = os.getenv("ZSTD_DICT_PATH", "")
+ZSTD_OLD_DICT_PATHS = [path.strip() for path in os.getenv("ZSTD_OLD_DICT_PATHS", "").split(",") if path.strip()]
+COMPRESS_MIN = 64
 RATE_LIMIT_TTL = 60
 RATE_LIMIT_COUNT = 5
+RATE_LIMIT_ALGORITHM = os.getenv("RATE_LIMIT_ALGORITHM", "window")
+RATE_LIMIT_LOCAL_SIZE = 65536
 MESSAGE_LIMIT = 1.0
+DEBOUNCE_DELAY = float(os.getenv("DEBOUNCE_DELAY", "0.8"))
+DEBOUNCE_MAX_WAIT = 3.0
+BURST_LIMIT = 10
+FAST_PATH = os.getenv("FAST_PATH", "true").lower() == "true"
+PHRASE_POOL_PATH = os.getenv("PHRASE_POOL_PATH", "")
 BROADCAST_DELAY = 0.03
 CHAT_LENGTH = 20
-CHAT_CLEANUP = 1800
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
+USER_TOKEN_BUDGET = int(os.getenv("USER_TOKEN_BUDGET", "0"))
+TOKEN_BUDGET_HARD = 2.0
+BUDGET_MODEL = os.getenv("BUDGET_MODEL", FAST_MODEL)
+BUDGET_CONTEXT = CONTEXT_TOKEN_BUDGET // 4
+USAGE_RETENTION = 7 * 86400
+SPILL_PATH = os.getenv("SPILL_PATH", "")
+HISTORY_MEMORY_BUDGET = int(os.getenv("HISTORY_MEMORY_MB", "64")) * 1024 * 1024
+EXPIRY_TICK = 5
 OLD_CHAT = 3600
@@ -1,11 +1,8 @@
 import random
-import time
 from typing import Dict
 from pyrogram.types import Message, User
 from Sakura.Core.logging import logger
 from Sakura.Modules.messages import RESPONSES, ERROR
-from Sakura import state
-from Sakura.Core.config import SESSION_TTL
 
 def fetch_user(msg: Message) -> Dict[str, any]:
     """Extract user and chat information from message"""
@@ -62,6 +59,10 @@ def should_reply(message: Message, bot_id: int) -> bool:
         return True
     return False
 
+def get_turn(message: Message) -> str:
+    """Build a unique turn ID for the exchange started by a message"""
+    return f"{message.chat.id}:{message.id}"
+
 def get_mention(user: User) -> str:
     """Create user mention for HTML parsing using first name"""
     first_name = user.first_name or "Friend"
@@ -74,14 +75,3 @@ def get_fallback() -> str:
 def get_error() -> str:
     """Get a random error response when something goes wrong"""
     return random.choice(ERROR)
-
-async def log_response(user_id: int) -> None:
-    """Update the last response time for user in Valkey"""
-    if state.valkey_client:
-        try:
-            key = f"last_response:{user_id}"
-            await state.valkey_client.setex(key, SESSION_TTL, int(time.time()))
-            logger.debug(f"⏰ Updated response time in Valkey for user {user_id}")
-        except Exception as e:
-            logger.error(f"❌ Failed to update response time in Valkey for user {user_id}: {e}")
-    state.user_last_response_time[user_id] = time.time()
\ No newline at end of file
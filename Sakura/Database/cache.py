@@ -1,87 +1,201 @@
-import orjson
-from Sakura.Core.config import CACHE_TTL
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable
+from Sakura.Core.config import CACHE_TTL, CACHE_L1_SIZE, CACHE_L1_TTL
 from Sakura.Core.logging import logger
+from Sakura.Database.valkey import mark_failure
+from Sakura.Database.codec import encode, decode
+from Sakura.Database.pipeline import run
+from Sakura.Services import metrics
 from Sakura import state
 
+INVALIDATION_CHANNEL = "cache:invalidate"
+INSTANCE_ID = uuid.uuid4().hex[:12]
+
+_MISSING = object()
+
+# TWO-TIER CACHE
+# L1 is a small per-process TTL/LRU map in front of Valkey (L2). Writes and deletes are
+# announced on INVALIDATION_CHANNEL so other instances drop their stale L1 copies.
+class LocalCache:
+    """Bounded in-process cache with per-entry expiry and LRU eviction"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+
+    def get(self, key: str) -> any:
+        entry = self.entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return _MISSING
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: any, ttl: float = None) -> None:
+        ttl = min(ttl, self.ttl) if ttl else self.ttl
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            metrics.increment("cache_evictions")
+
+    def delete(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+local_cache = LocalCache(CACHE_L1_SIZE, CACHE_L1_TTL)
+_inflight = {}
+
 async def set_cache(key: str, value: any, ttl: int = CACHE_TTL):
-    """Set cache value in Valkey"""
+    """Set cache value in memory and Valkey"""
+    local_cache.set(key, value, ttl)
     if not state.valkey_client:
         return False
 
     try:
-        if isinstance(value, (dict, list)):
-            value = orjson.dumps(value)
-        await state.valkey_client.setex(f"cache:{key}", ttl, value)
+        await asyncio.gather(
+            run("SETEX", f"cache:{key}", ttl, encode(value)),
+            run("PUBLISH", INVALIDATION_CHANNEL, f"{INSTANCE_ID}|{key}")
+        )
         logger.debug(f"📦 Cache set for key: {key}")
         return True
     except Exception as e:
+        mark_failure(e)
         logger.error(f"❌ Failed to set cache for key {key}: {e}")
         return False
 
+async def _read_cache(key: str) -> any:
+    """Read a value from L1, then Valkey, returning _MISSING when absent"""
+    value = local_cache.get(key)
+    if value is not _MISSING:
+        metrics.increment("cache_l1_hits")
+        return value
+
+    if state.valkey_client:
+        try:
+            raw, ttl = await asyncio.gather(
+                run("GET", f"cache:{key}"),
+                run("TTL", f"cache:{key}")
+            )
+            if raw is not None:
+                value = decode(raw)
+                local_cache.set(key, value, ttl if ttl and ttl > 0 else None)
+                metrics.increment("cache_l2_hits")
+                return value
+        except Exception as e:
+            mark_failure(e)
+            logger.error(f"❌ Failed to get cache for key {key}: {e}")
+
+    metrics.increment("cache_misses")
+    return _MISSING
+
 async def get_cache(key: str) -> any:
-    """Get cache value from Valkey"""
-    if not state.valkey_client:
-        return None
+    """Get cache value from memory or Valkey"""
+    value = await _read_cache(key)
+    return None if value is _MISSING else value
+
+async def get_or_load(key: str, loader: Callable[[], Awaitable[any]], ttl: int = CACHE_TTL) -> any:
+    """
+    Get a cached value, loading and caching it on a miss.
+
+    Concurrent misses for the same key share a single loader call. If that call is
+    cancelled, a waiting caller takes over and runs the loader itself.
+
+    Args:
+        key: The cache key.
+        loader: Coroutine function producing the value, None results are not cached.
+        ttl: Expiry for a freshly loaded value in seconds.
+
+    Returns:
+        The cached or freshly loaded value.
+    """
+    value = await _read_cache(key)
+    if value is not _MISSING:
+        return value
+
+    pending = _inflight.get(key)
+    if pending:
+        metrics.increment("cache_coalesced")
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            # Only the leader was cancelled, not this caller
+            if pending.cancelled() and not asyncio.current_task().cancelling():
+                return await get_or_load(key, loader, ttl)
+            raise
 
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
     try:
-        value = await state.valkey_client.get(f"cache:{key}")
-        if value:
-            try:
-                return orjson.loads(value)
-            except:
-                return value
-        return None
+        value = await loader()
+        if value is not None:
+            await set_cache(key, value, ttl)
+        future.set_result(value)
+        return value
     except Exception as e:
-        logger.error(f"❌ Failed to get cache for key {key}: {e}")
-        return None
+        future.set_exception(e)
+        future.exception()  # mark retrieved when nobody else was waiting
+        raise
+    finally:
+        # Cancellation is a BaseException, release the waiters in that case too
+        if not future.done():
+            future.cancel()
+        _inflight.pop(key, None)
 
 async def delete_cache(key: str):
-    """Delete cache value from Valkey"""
+    """Delete cache value from memory and Valkey"""
+    local_cache.delete(key)
     if not state.valkey_client:
         return False
 
     try:
-        await state.valkey_client.delete(f"cache:{key}")
+        await asyncio.gather(
+            run("DEL", f"cache:{key}"),
+            run("PUBLISH", INVALIDATION_CHANNEL, f"{INSTANCE_ID}|{key}")
+        )
         logger.debug(f"🗑️ Cache deleted for key: {key}")
         return True
     except Exception as e:
+        mark_failure(e)
         logger.error(f"❌ Failed to delete cache for key {key}: {e}")
         return False
 
-async def set_last_message(user_id: int, text: str) -> None:
-    """
-    Caches the last message sent by the bot to a user.
+async def listen_invalidations():
+    """Drop local cache entries changed by other bot instances"""
+    logger.info("📡 Cache invalidation listener started")
 
-    Args:
-        user_id: The user's ID.
-        text: The message text to cache.
-    """
-    if state.valkey_client:
+    while True:
+        pubsub = None
         try:
-            await state.valkey_client.set(f"last_message:{user_id}", text, ex=3600)  # Cache for 1 hour
-            logger.info(f"Cached last message for user {user_id}")
+            if not state.valkey_client:
+                await asyncio.sleep(5)
+                continue
+            pubsub = state.valkey_client.pubsub(ignore_subscribe_messages=True)
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                instance_id, _, key = message["data"].decode("utf-8").partition("|")
+                if instance_id != INSTANCE_ID:
+                    local_cache.delete(key)
+                    metrics.increment("cache_invalidations")
+        except asyncio.CancelledError:
+            logger.info("📡 Cache invalidation listener stopped")
+            break
         except Exception as e:
-            logger.error(f"Failed to cache last message for user {user_id}: {e}")
-
-async def get_last_message(user_id: int) -> str | None:
-    """
-    Retrieves the last cached message for a user.
-
-    Args:
-        user_id: The user's ID.
-
-    Returns:
-        The cached message text, or None if not found or on error.
-    """
-    if not state.valkey_client:
-        return None
-
-    try:
-        last_message = await state.valkey_client.get(f"last_message:{user_id}")
-        if last_message:
-            logger.info(f"Retrieved last message for user {user_id}")
-            return last_message
-        return None
-    except Exception as e:
-        logger.error(f"Failed to retrieve last message for user {user_id}: {e}")
-        return None
\ No newline at end of file
+            logger.error(f"❌ Cache invalidation listener error: {e}")
+            await asyncio.sleep(5)
+        finally:
+            if pubsub:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
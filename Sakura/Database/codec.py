@@ -0,0 +1,169 @@
+import sys
+import orjson
+from Sakura.Core.config import ZSTD_DICT_PATH, ZSTD_OLD_DICT_PATHS, COMPRESS_MIN
+from Sakura.Core.logging import logger
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# VALKEY PAYLOAD CODEC
+# Every value starts with a one byte tag. Only the exact tag values below are treated as
+# tagged; anything else (JSON, text, even text starting with a tab or newline) is a
+# legacy value written before the codec existed. Compressed bodies are zstd frames, whose
+# header carries the id of the dictionary they were compressed with, so values stay
+# readable after the dictionary is rotated as long as the old one is still listed in
+# ZSTD_OLD_DICT_PATHS.
+TAG_USER = 0x01       # conversation turn from the user, body is UTF-8 content
+TAG_ASSISTANT = 0x02  # conversation turn from Sakura, body is UTF-8 content
+TAG_TEXT = 0x03       # plain string, body is UTF-8
+TAG_JSON = 0x04       # any other value, body is orjson
+TAG_ZSTD = 0x10       # flag: body is zstd compressed
+
+ROLES = {
+    TAG_USER: sys.intern("user"),
+    TAG_ASSISTANT: sys.intern("assistant"),
+}
+ROLE_TAGS = {role: tag for tag, role in ROLES.items()}
+TAGS = frozenset(tag | flag for tag in (TAG_USER, TAG_ASSISTANT, TAG_TEXT, TAG_JSON) for flag in (0, TAG_ZSTD))
+
+_compressor = None
+# Decompressors by dictionary id, 0 is plain zstd without a dictionary
+_decompressors = {}
+
+def _read_dictionary(path: str):
+    with open(path, "rb") as f:
+        return zstandard.ZstdCompressionDict(f.read())
+
+def load_dictionary() -> bool:
+    """Load the zstd dictionaries (if configured) and prepare the compressors"""
+    global _compressor
+    if not zstandard:
+        logger.info("📦 zstandard not installed, Valkey payloads will be stored uncompressed")
+        return False
+
+    _decompressors[0] = zstandard.ZstdDecompressor()
+    for path in ZSTD_OLD_DICT_PATHS:
+        try:
+            old = _read_dictionary(path)
+            _decompressors[old.dict_id()] = zstandard.ZstdDecompressor(dict_data=old)
+            logger.info(f"📦 Loaded previous zstd dictionary {old.dict_id()} from {path} for reading")
+        except Exception as e:
+            logger.error(f"❌ Failed to load previous zstd dictionary from {path}: {e}")
+
+    dictionary = None
+    if ZSTD_DICT_PATH:
+        try:
+            dictionary = _read_dictionary(ZSTD_DICT_PATH)
+            _decompressors[dictionary.dict_id()] = zstandard.ZstdDecompressor(dict_data=dictionary)
+            logger.info(f"📦 Loaded zstd dictionary {dictionary.dict_id()} from {ZSTD_DICT_PATH}")
+        except Exception as e:
+            logger.error(f"❌ Failed to load zstd dictionary from {ZSTD_DICT_PATH}: {e}")
+
+    _compressor = zstandard.ZstdCompressor(level=3, dict_data=dictionary, write_content_size=True, write_dict_id=True)
+    return True
+
+def train_dictionary(samples: list, size: int = 16384) -> bytes:
+    """Train a zstd dictionary from raw encoded payloads"""
+    if not zstandard:
+        raise RuntimeError("zstandard is required to train a dictionary")
+    return zstandard.train_dictionary(size, samples).as_bytes()
+
+def _pack(tag: int, body: bytes) -> bytes:
+    """Prefix a body with its tag, compressing it when that saves space"""
+    if _compressor and len(body) >= COMPRESS_MIN:
+        compressed = _compressor.compress(body)
+        if len(compressed) < len(body):
+            return bytes((tag | TAG_ZSTD,)) + compressed
+    return bytes((tag,)) + body
+
+def _unpack(data: bytes) -> tuple:
+    """Split a tagged value into its tag and (decompressed) body"""
+    tag = data[0]
+    body = data[1:]
+    if tag & TAG_ZSTD:
+        if not zstandard:
+            raise ValueError("Compressed Valkey payload found but zstandard is not available")
+        dict_id = zstandard.get_frame_parameters(body).dict_id
+        decompressor = _decompressors.get(dict_id)
+        if not decompressor:
+            raise ValueError(f"Valkey payload was compressed with unknown zstd dictionary {dict_id}")
+        body = decompressor.decompress(body)
+        tag &= ~TAG_ZSTD
+    return tag, body
+
+def _is_tagged(data: bytes) -> bool:
+    return bool(data) and data[0] in TAGS
+
+def encode(value: any) -> bytes:
+    """Encode a value for storage in Valkey"""
+    if isinstance(value, str):
+        return _pack(TAG_TEXT, value.encode("utf-8"))
+    return _pack(TAG_JSON, orjson.dumps(value))
+
+def decode(data: bytes | str | None) -> any:
+    """Decode a value read from Valkey, including values written before the codec existed"""
+    if data is None:
+        return None
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    if not _is_tagged(data):
+        if data[:1] in (b"{", b"["):
+            return orjson.loads(data)
+        return data.decode("utf-8")
+
+    tag, body = _unpack(data)
+    if tag == TAG_TEXT:
+        return body.decode("utf-8")
+    if tag == TAG_JSON:
+        return orjson.loads(body)
+    if tag in ROLES:
+        return {"role": ROLES[tag], "content": body.decode("utf-8")}
+    raise ValueError(f"Unknown Valkey payload tag: {tag:#x}")
+
+def encode_turn(message: dict) -> bytes:
+    """Encode one conversation message as role tag + content"""
+    tag = ROLE_TAGS.get(message["role"])
+    if tag is None:
+        return encode(message)
+    return _pack(tag, message["content"].encode("utf-8"))
+
+def decode_turn(data: bytes | str) -> dict:
+    """Decode one conversation message, accepting legacy JSON items"""
+    return decode(data)
+
+load_dictionary()
+
+
+async def _train(output_path: str, limit: int = 5000) -> None:
+    """Train a dictionary from the conversation turns currently stored in Valkey"""
+    from Sakura.Database.valkey import connect_cache, close_cache
+    from Sakura import state
+
+    if not await connect_cache():
+        return
+    samples = []
+    try:
+        async for key in state.valkey_client.scan_iter(match="conversation:*", count=500):
+            for item in await state.valkey_client.lrange(key, 0, -1):
+                try:
+                    message = decode_turn(item)
+                except ValueError:
+                    continue
+                if isinstance(message, dict):
+                    samples.append(message["content"].encode("utf-8"))
+            if len(samples) >= limit:
+                break
+    finally:
+        await close_cache()
+
+    dictionary = train_dictionary(samples)
+    with open(output_path, "wb") as f:
+        f.write(dictionary)
+    logger.info(f"✅ Trained zstd dictionary on {len(samples)} turns ({len(dictionary)} bytes) -> {output_path}")
+
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(_train(sys.argv[1] if len(sys.argv) > 1 else "sakura.zdict"))
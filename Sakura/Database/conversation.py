@@ -1,39 +1,190 @@
-import orjson
-from Sakura.Core.config import CHAT_LENGTH, SESSION_TTL
+import uuid
+from collections import deque
+from valkey.exceptions import ResponseError, NoScriptError
+from Sakura.Core.config import CHAT_LENGTH, SESSION_TTL, OLD_CHAT
 from Sakura.Core.logging import logger
+from Sakura.Database.valkey import mark_failure
+from Sakura.Database.codec import encode_turn, decode_turn, decode
+from Sakura.Database.pipeline import run
+from Sakura.Database.spill import spill_store
+from Sakura.Services.expiry import expiry_index
+from Sakura.Services import metrics
 from Sakura import state
 
-async def add_history(user_id: int, message: str, is_user: bool = True):
-    """Add message to user's conversation history (Valkey + memory fallback)"""
-    role = "user" if is_user else "assistant"
-    new_message = {"role": role, "content": message}
+# Records both messages of a turn only if its marker key did not exist yet, counting
+# every message ever committed in the "messages" field of the user hash
+COMMIT_TURN_SCRIPT = """
+if redis.call('TYPE', KEYS[1])['ok'] == 'string' then
+    return redis.error_reply('WRONGTYPE legacy conversation blob')
+end
+if redis.call('SET', KEYS[2], '1', 'NX', 'EX', ARGV[1]) then
+    redis.call('RPUSH', KEYS[1], ARGV[3], ARGV[4])
+    redis.call('HINCRBY', KEYS[3], 'messages', 2)
+    redis.call('LTRIM', KEYS[1], -tonumber(ARGV[2]), -1)
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+    redis.call('EXPIRE', KEYS[3], ARGV[1])
+    return 1
+end
+return 0
+"""
 
-    if state.valkey_client:
+# Replaces a legacy blob with list items only if the blob is still the one that was read
+MIGRATE_HISTORY_SCRIPT = """
+if redis.call('TYPE', KEYS[1])['ok'] ~= 'string' or redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+if #ARGV > 2 then
+    redis.call('RPUSH', KEYS[1], unpack(ARGV, 3))
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 1
+"""
+
+_commit_sha = None
+_migrate_script = None
+
+def is_legacy(error: Exception) -> bool:
+    """Check if a Valkey error was caused by an old JSON blob stored under the list key"""
+    return isinstance(error, ResponseError) and "WRONGTYPE" in str(error)
+
+def is_noscript(error: Exception) -> bool:
+    """Check if a Valkey error means the commit script is no longer cached on the server"""
+    return isinstance(error, NoScriptError)
+
+def parse_history(items: list) -> list:
+    """Decode the raw items of a conversation list, skipping items that cannot be decoded"""
+    history = []
+    for item in items:
         try:
-            key = f"conversation:{user_id}"
-            existing = await state.valkey_client.get(key)
-            history = orjson.loads(existing) if existing else []
-            history.append(new_message)
-            if len(history) > CHAT_LENGTH:
-                history = history[-CHAT_LENGTH:]
-            await state.valkey_client.setex(key, SESSION_TTL, orjson.dumps(history))
-            logger.debug(f"💬 Conversation updated in Valkey for user {user_id}")
-            return
+            history.append(decode_turn(item))
         except Exception as e:
-            logger.error(f"❌ Failed to update conversation in Valkey for user {user_id}: {e}")
+            metrics.increment("codec_errors")
+            logger.warning(f"⚠️ Skipping undecodable conversation item: {e}")
+    return history
+
+async def migrate_history(user_id: int) -> list:
+    """
+    Convert a legacy JSON blob conversation key into a native Valkey list.
+
+    The swap is a script that only runs if the blob is unchanged, so concurrent
+    handlers migrating the same user all end up reading the one converted list.
+    """
+    global _migrate_script
+    if _migrate_script is None:
+        _migrate_script = state.valkey_client.register_script(MIGRATE_HISTORY_SCRIPT)
+
+    key = f"conversation:{user_id}"
+    for _ in range(2):
+        try:
+            existing = await state.valkey_client.get(key)
+        except ResponseError as e:
+            if not is_legacy(e):
+                raise
+            # Another handler converted it first
+            return parse_history(await state.valkey_client.lrange(key, 0, -1))
+        if existing is None:
+            return []
+
+        history = decode(existing)[-CHAT_LENGTH:]
+        migrated = await _migrate_script(
+            keys=[key],
+            args=[existing, SESSION_TTL, *[encode_turn(msg) for msg in history]],
+            client=state.valkey_client
+        )
+        if migrated:
+            logger.info(f"🔁 Migrated legacy conversation blob to list for user {user_id} ({len(history)} messages)")
+            return history
+    return parse_history(await state.valkey_client.lrange(key, 0, -1))
+
+async def commit_script_sha(reload: bool = False) -> str:
+    """SHA of the turn commit script, loaded into Valkey once and again after a NOSCRIPT"""
+    global _commit_sha
+    if _commit_sha is None or reload:
+        _commit_sha = await state.valkey_client.script_load(COMMIT_TURN_SCRIPT)
+    return _commit_sha
+
+async def queue_turn(pipe, user_id: int, turn_id: str, messages: list) -> None:
+    """Queue the turn commit script on a pipeline by its SHA, without any extra round trip"""
+    sha = await commit_script_sha()
+    pipe.evalsha(
+        sha, 3, f"conversation:{user_id}", f"turn:{user_id}:{turn_id}", f"user:{user_id}",
+        SESSION_TTL, CHAT_LENGTH, *[encode_turn(msg) for msg in messages]
+    )
+
+async def _commit_turn(user_id: int, turn_id: str, messages: list) -> bool:
+    """Run the turn commit script, returns False if the turn was already recorded"""
+    for attempt in range(2):
+        pipe = state.valkey_client.pipeline(transaction=False)
+        await queue_turn(pipe, user_id, turn_id, messages)
+        committed, = await pipe.execute(raise_on_error=False)
+        if is_noscript(committed) and not attempt:
+            await commit_script_sha(reload=True)
+            continue
+        if isinstance(committed, Exception):
+            raise committed
+        return bool(committed)
+
+async def memory_history(user_id: int) -> list:
+    """Get a user's in-memory history, pulling it back from the spill store if needed"""
+    history = state.conversation_history.get(user_id)
+    if history is None and spill_store.enabled:
+        history = await spill_store.take(user_id)
+        if history:
+            state.conversation_history.extend(user_id, history)
+            expiry_index.touch("conversation", user_id, OLD_CHAT)
+    return history or []
 
-    if user_id not in state.conversation_history:
-        state.conversation_history[user_id] = []
-    state.conversation_history[user_id].append(new_message)
-    if len(state.conversation_history[user_id]) > CHAT_LENGTH:
-        state.conversation_history[user_id] = state.conversation_history[user_id][-CHAT_LENGTH:]
+async def commit_turn(user_id: int, user_message: str, ai_response: str, turn_id: str = None) -> bool:
+    """
+    Record one user/assistant exchange in the conversation history.
 
+    Both messages are written atomically in a single round trip and repeated
+    commits with the same turn ID are ignored.
 
-async def update_history(user_id: int, user_message: str, ai_response: str):
-    """Add both user message and AI response to history."""
-    await add_history(user_id, user_message, is_user=True)
-    await add_history(user_id, ai_response, is_user=False)
-    logger.debug(f"📜 Updated conversation history for user {user_id}")
+    Args:
+        user_id: The user's ID.
+        user_message: The message as it should appear in history.
+        ai_response: Sakura's reply.
+        turn_id: Unique ID of the exchange, usually "{chat_id}:{message_id}".
+
+    Returns:
+        True if the turn was recorded, False if it was a duplicate.
+    """
+    turn_id = turn_id or uuid.uuid4().hex
+    messages = [
+        {"role": "user", "content": user_message},
+        {"role": "assistant", "content": ai_response},
+    ]
+
+    if state.valkey_client:
+        try:
+            try:
+                committed = await _commit_turn(user_id, turn_id, messages)
+            except ResponseError as e:
+                if not is_legacy(e):
+                    raise
+                await migrate_history(user_id)
+                committed = await _commit_turn(user_id, turn_id, messages)
+            if committed:
+                logger.debug(f"📜 Committed turn {turn_id} to Valkey for user {user_id}")
+            else:
+                logger.debug(f"♻️ Ignored duplicate turn {turn_id} for user {user_id}")
+            return committed
+        except Exception as e:
+            mark_failure(e)
+            logger.error(f"❌ Failed to commit turn to Valkey for user {user_id}: {e}")
+
+    turns = state.conversation_turns.setdefault(user_id, deque(maxlen=CHAT_LENGTH))
+    if turn_id in turns:
+        logger.debug(f"♻️ Ignored duplicate turn {turn_id} for user {user_id}")
+        return False
+    turns.append(turn_id)
+
+    await memory_history(user_id)
+    state.conversation_history.extend(user_id, messages)
+    expiry_index.touch("conversation", user_id, OLD_CHAT)
+    return True
 
 
 async def get_history(user_id: int) -> list:
@@ -42,14 +193,19 @@ async def get_history(user_id: int) -> list:
     if state.valkey_client:
         try:
             key = f"conversation:{user_id}"
-            existing = await state.valkey_client.get(key)
-            if existing:
-                history = orjson.loads(existing)
+            try:
+                items = await run("LRANGE", key, 0, -1)
+                history = parse_history(items)
+            except ResponseError as e:
+                if not is_legacy(e):
+                    raise
+                history = await migrate_history(user_id)
         except Exception as e:
+            mark_failure(e)
             logger.error(f"❌ Failed to get conversation from Valkey for user {user_id}: {e}")
 
-    if not history and user_id in state.conversation_history:
-        history = state.conversation_history[user_id]
+    if not history:
+        history = await memory_history(user_id)
 
     return history
 
@@ -59,4 +215,54 @@ async def get_context(user_id: int) -> str:
     if not history:
         return ""
     context_lines = [f"User: {msg['content']}" if msg["role"] == "user" else f"Sakura: {msg['content']}" for msg in history]
-    return "\n".join(context_lines)
\ No newline at end of file
+    return "\n".join(context_lines)
+
+async def _restore_history(user_id: int, messages: list) -> None:
+    """Append messages kept outside Valkey to the user's Valkey list"""
+    key = f"conversation:{user_id}"
+    pipe = state.valkey_client.pipeline(transaction=True)
+    pipe.rpush(key, *[encode_turn(msg) for msg in messages])
+    pipe.hincrby(f"user:{user_id}", "messages", len(messages))
+    pipe.expire(f"user:{user_id}", SESSION_TTL)
+    pipe.ltrim(key, -CHAT_LENGTH, -1)
+    pipe.expire(key, SESSION_TTL)
+    await pipe.execute()
+
+async def reconcile_history() -> None:
+    """Push conversations recorded in memory or on disk during a Valkey outage back into Valkey"""
+    if not state.valkey_client:
+        return
+
+    restored = 0
+    for user_id in state.conversation_history.keys():
+        messages = state.conversation_history.get(user_id)
+        if not messages:
+            continue
+        try:
+            await _restore_history(user_id, messages)
+        except Exception as e:
+            mark_failure(e)
+            logger.error(f"❌ Failed to reconcile conversation for user {user_id}: {e}")
+            if not state.valkey_client:
+                return
+            continue
+        state.conversation_history.pop(user_id)
+        restored += 1
+
+    for user_id in await spill_store.users():
+        messages = await spill_store.take(user_id)
+        if not messages:
+            continue
+        try:
+            await _restore_history(user_id, messages)
+        except Exception as e:
+            mark_failure(e)
+            logger.error(f"❌ Failed to replay spilled conversation for user {user_id}: {e}")
+            await spill_store.put(user_id, messages)
+            if not state.valkey_client:
+                return
+            continue
+        restored += 1
+
+    if restored:
+        logger.info(f"🔁 Reconciled {restored} conversations back into Valkey")
@@ -0,0 +1,112 @@
+import sys
+from collections import OrderedDict, deque
+from Sakura.Core.config import CHAT_LENGTH, HISTORY_MEMORY_BUDGET
+from Sakura.Services import metrics
+
+# Rough per-object costs used for the memory budget (CPython, 64-bit)
+TURN_OVERHEAD = 56
+USER_OVERHEAD = 760
+
+class Turn:
+    """One conversation message kept in memory"""
+    __slots__ = ("role", "content")
+
+    def __init__(self, role: str, content: str):
+        self.role = sys.intern(role)
+        self.content = content
+
+    def as_dict(self) -> dict:
+        return {"role": self.role, "content": self.content}
+
+    def size(self) -> int:
+        return TURN_OVERHEAD + sys.getsizeof(self.content)
+
+
+class _Conversation:
+    __slots__ = ("turns", "size")
+
+    def __init__(self, capacity: int):
+        self.turns = deque(maxlen=capacity)
+        self.size = USER_OVERHEAD
+
+
+class HistoryStore:
+    """
+    Bounded in-memory conversation history used while Valkey is unavailable.
+
+    Every user gets a fixed-capacity ring buffer of turns, and the whole store is
+    kept under a global byte budget by evicting the least recently used users.
+    Evicted conversations are handed to on_evict (the spill store) when it is set.
+    """
+
+    def __init__(self, capacity: int = CHAT_LENGTH, budget: int = HISTORY_MEMORY_BUDGET):
+        self.capacity = capacity
+        self.budget = budget
+        self.total_size = 0
+        self.users = OrderedDict()
+        self.on_evict = None
+
+    def extend(self, user_id: int, messages: list) -> None:
+        """Append messages to a user's history, dropping the oldest beyond capacity"""
+        conversation = self.users.get(user_id)
+        if conversation is None:
+            conversation = self.users[user_id] = _Conversation(self.capacity)
+            self.total_size += conversation.size
+        else:
+            self.users.move_to_end(user_id)
+
+        for message in messages:
+            if len(conversation.turns) == self.capacity:
+                dropped = conversation.turns[0].size()
+                conversation.size -= dropped
+                self.total_size -= dropped
+            turn = Turn(message["role"], message["content"])
+            conversation.turns.append(turn)
+            conversation.size += turn.size()
+            self.total_size += turn.size()
+        self._enforce_budget()
+
+    def get(self, user_id: int, default=None) -> list:
+        """Get a user's history as a list of dicts"""
+        conversation = self.users.get(user_id)
+        if conversation is None:
+            return default
+        self.users.move_to_end(user_id)
+        return [turn.as_dict() for turn in conversation.turns]
+
+    def pop(self, user_id: int, default=None) -> list:
+        """Remove a user's history and return it"""
+        conversation = self.users.pop(user_id, None)
+        if conversation is None:
+            return default
+        self.total_size -= conversation.size
+        metrics.set_gauge("fallback_bytes", self.total_size)
+        return [turn.as_dict() for turn in conversation.turns]
+
+    def _enforce_budget(self) -> None:
+        while self.total_size > self.budget and len(self.users) > 1:
+            user_id, conversation = self.users.popitem(last=False)
+            self.total_size -= conversation.size
+            metrics.increment("fallback_evictions")
+            if self.on_evict:
+                self.on_evict(user_id, [turn.as_dict() for turn in conversation.turns])
+        metrics.set_gauge("fallback_bytes", self.total_size)
+
+    def __getitem__(self, user_id: int) -> list:
+        history = self.get(user_id)
+        if history is None:
+            raise KeyError(user_id)
+        return history
+
+    def __delitem__(self, user_id: int) -> None:
+        if self.pop(user_id) is None:
+            raise KeyError(user_id)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self.users
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def keys(self) -> list:
+        return list(self.users.keys())
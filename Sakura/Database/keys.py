@@ -1,5 +1,7 @@
 from Sakura import state
 from Sakura.Core.logging import logger
+from Sakura.Database.valkey import mark_failure
+from Sakura.Database.pipeline import run
 
 API_KEY_INDEX_KEY = "sakura:api_key_index"
 
@@ -9,11 +11,12 @@ async def get_key() -> int:
         logger.debug("Valkey client not ready, returning default key index 0.")
         return 0
     try:
-        index = await state.valkey_client.get(API_KEY_INDEX_KEY)
+        index = await run("GET", API_KEY_INDEX_KEY)
         key_index = int(index) if index else 0
         logger.debug(f"Retrieved API key index from Valkey: {key_index}")
         return key_index
     except Exception as e:
+        mark_failure(e)
         logger.error(f"❌ Failed to get API key index from Valkey: {e}")
         return 0
 
@@ -24,6 +27,7 @@ async def set_key(index: int):
         return
     try:
         logger.debug(f"Setting API key index in Valkey to {index}.")
-        await state.valkey_client.set(API_KEY_INDEX_KEY, index)
+        await run("SET", API_KEY_INDEX_KEY, index)
     except Exception as e:
+        mark_failure(e)
         logger.error(f"❌ Failed to set API key index in Valkey: {e}")
\ No newline at end of file
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from valkey.exceptions import ConnectionError as ValkeyConnectionError
+from Sakura.Core.logging import logger
+from Sakura.Services import metrics
+from Sakura import state
+
+# AUTO-PIPELINING
+# Independent commands issued by concurrent handlers are queued and sent together as
+# one pipeline. Only one batch is in flight at a time, so commands reach Valkey in the
+# order they were issued; whatever queues up meanwhile rides along in the next batch.
+class AutoPipeline:
+    """Collects Valkey commands from concurrent callers into shared pipelines"""
+
+    def __init__(self):
+        self.queue = []
+        self.sender = None
+
+    async def execute(self, *args, **options) -> any:
+        """Queue one command and wait for its own result"""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.append((args, options, future))
+        if not self.sender or self.sender.done():
+            self.sender = asyncio.create_task(self._send())
+        return await future
+
+    async def _send(self) -> None:
+        """Send queued commands batch by batch until the queue is empty"""
+        while self.queue:
+            # Let every handler that is ready in this loop tick add its command first
+            await asyncio.sleep(0)
+            batch, self.queue = self.queue, []
+            await self._send_batch(batch)
+
+    async def _send_batch(self, batch: list) -> None:
+        client = state.valkey_client
+        if not client:
+            error = ValkeyConnectionError("Valkey client not available")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        started = time.perf_counter()
+        try:
+            pipe = client.pipeline(transaction=False)
+            for args, options, _ in batch:
+                pipe.execute_command(*args, **options)
+            results = await pipe.execute(raise_on_error=False)
+        except Exception as e:
+            logger.debug(f"📦 Auto-pipeline batch of {len(batch)} failed: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        metrics.increment("pipeline_batches")
+        metrics.increment("pipeline_commands", len(batch))
+        metrics.observe("pipeline_batch_size", len(batch))
+        metrics.observe("pipeline_rtt", time.perf_counter() - started)
+
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+auto_pipeline = AutoPipeline()
+
+async def run(*args, **options) -> any:
+    """Run one Valkey command through the shared auto-pipeline"""
+    return await auto_pipeline.execute(*args, **options)
@@ -0,0 +1,162 @@
+import time
+from typing import Optional
+from valkey.exceptions import ResponseError
+from Sakura.Core.config import SESSION_TTL, OLD_CHAT
+from Sakura.Core.logging import logger
+from Sakura.Database.valkey import mark_failure
+from Sakura.Database.codec import encode, decode
+from Sakura.Services.expiry import expiry_index
+from Sakura.Services import metrics
+from Sakura.Services.usage import queue_usage, today
+from Sakura.Database.conversation import (
+    commit_turn,
+    queue_turn,
+    parse_history,
+    is_legacy,
+    is_noscript,
+    commit_script_sha,
+    migrate_history,
+    memory_history,
+)
+from Sakura import state
+
+# Per-user state record
+# Everything a handler needs for one user lives in the "user:{id}" hash next to the
+# "conversation:{id}" list. Both are read in one pipeline by load_record() and all
+# changes are written back in one pipeline by save_record().
+class UserRecord:
+    """Snapshot of a user's state loaded at the start of a handler"""
+
+    def __init__(self, user_id: int, history: list, fields: dict):
+        self.user_id = user_id
+        self.history = history
+        self.fields = fields
+        self.dirty = set()
+        self.turn = None
+        self.usage = None
+        self.tokens_today = 0
+
+    def get(self, field: str, default=None):
+        """Get a field value from the record"""
+        return self.fields.get(field, default)
+
+    def set(self, field: str, value) -> None:
+        """Set a field value and mark it for the next save"""
+        self.fields[field] = value
+        self.dirty.add(field)
+
+    def stage_turn(self, user_message: str, ai_response: str, turn_id: Optional[str] = None) -> None:
+        """Stage a conversation turn to be committed on save"""
+        self.turn = (user_message, ai_response, turn_id)
+        self.history = self.history + [
+            {"role": "user", "content": user_message},
+            {"role": "assistant", "content": ai_response},
+        ]
+
+    def stage_usage(self, chat_id: int, usage: dict) -> None:
+        """Stage a reply's token counts to be added to the counters on save"""
+        if any(usage.values()):
+            self.usage = (chat_id, usage)
+
+    def mark_response(self) -> None:
+        """Record that Sakura just replied to this user"""
+        now = time.time()
+        self.set("last_response", int(now))
+        state.user_last_response_time[self.user_id] = now
+        expiry_index.touch("conversation", self.user_id, OLD_CHAT)
+
+    @property
+    def last_message(self) -> Optional[str]:
+        """The last message Sakura sent, taken from the conversation history"""
+        for msg in reversed(self.history):
+            if msg["role"] == "assistant":
+                return msg["content"]
+        return None
+
+
+async def load_record(user_id: int) -> UserRecord:
+    """Load a user's hash and conversation history in one round trip"""
+    history, fields, tokens = [], {}, 0
+    if state.valkey_client:
+        try:
+            pipe = state.valkey_client.pipeline(transaction=False)
+            pipe.hgetall(f"user:{user_id}")
+            pipe.lrange(f"conversation:{user_id}", 0, -1)
+            pipe.zscore(f"tokens:{today()}:users", user_id)
+            raw_fields, items, score = await pipe.execute(raise_on_error=False)
+            if isinstance(raw_fields, Exception):
+                raise raw_fields
+            for field, value in raw_fields.items():
+                try:
+                    fields[field.decode("utf-8")] = decode(value)
+                except Exception as e:
+                    metrics.increment("codec_errors")
+                    logger.warning(f"⚠️ Skipping undecodable field {field!r} of user {user_id}: {e}")
+            if isinstance(items, ResponseError) and is_legacy(items):
+                history = await migrate_history(user_id)
+            elif isinstance(items, Exception):
+                raise items
+            else:
+                history = parse_history(items)
+            if score and not isinstance(score, Exception):
+                tokens = int(score)
+            logger.debug(f"📥 Loaded user record for {user_id} ({len(history)} messages)")
+        except Exception as e:
+            mark_failure(e)
+            logger.error(f"❌ Failed to load user record from Valkey for user {user_id}: {e}")
+            fields = {}
+
+    if not history:
+        history = await memory_history(user_id)
+
+    record = UserRecord(user_id, history, fields)
+    record.tokens_today = tokens
+    return record
+
+
+async def save_record(record: UserRecord) -> None:
+    """Write the staged turn, token usage and dirty fields of a record in one round trip"""
+    if not record.turn and not record.dirty and not record.usage:
+        return
+
+    user_id = record.user_id
+    turn, record.turn = record.turn, None
+    usage, record.usage = record.usage, None
+    dirty = {field: encode(record.fields[field]) for field in record.dirty}
+    record.dirty = set()
+
+    if state.valkey_client:
+        try:
+            pipe = state.valkey_client.pipeline(transaction=False)
+            if turn:
+                user_message, ai_response, turn_id = turn
+                await queue_turn(pipe, user_id, turn_id or f"record:{time.time_ns()}", [
+                    {"role": "user", "content": user_message},
+                    {"role": "assistant", "content": ai_response},
+                ])
+            if dirty:
+                pipe.hset(f"user:{user_id}", mapping=dirty)
+                pipe.expire(f"user:{user_id}", SESSION_TTL)
+            if usage:
+                queue_usage(pipe, user_id, *usage)
+            results = await pipe.execute(raise_on_error=False)
+
+            if turn and isinstance(results[0], Exception):
+                if is_legacy(results[0]):
+                    await migrate_history(user_id)
+                elif is_noscript(results[0]):
+                    await commit_script_sha(reload=True)
+                else:
+                    raise results[0]
+                await commit_turn(user_id, *turn)
+            for result in results[1:] if turn else results:
+                if isinstance(result, Exception):
+                    raise result
+            logger.debug(f"💾 Saved user record for {user_id}")
+            return
+        except Exception as e:
+            mark_failure(e)
+            logger.error(f"❌ Failed to save user record to Valkey for user {user_id}: {e}")
+
+    if turn:
+        await commit_turn(user_id, *turn)
@@ -1,51 +1,56 @@
-import orjson
+import asyncio
 from Sakura.Core.config import SESSION_TTL
 from Sakura.Core.logging import logger
+from Sakura.Database.valkey import mark_failure
+from Sakura.Database.pipeline import run
+from Sakura.Database.codec import encode, decode
 from Sakura import state
 
 async def save_session(user_id: int, session_data: dict):
-    """Save user session data to Valkey"""
+    """Save user session data to the user's Valkey record"""
     if not state.valkey_client:
         return False
 
     try:
-        key = f"session:{user_id}"
-        await state.valkey_client.setex(
-            key,
-            SESSION_TTL,
-            orjson.dumps(session_data)
+        key = f"user:{user_id}"
+        await asyncio.gather(
+            run("HSET", key, "session", encode(session_data)),
+            run("EXPIRE", key, SESSION_TTL)
         )
         logger.debug(f"💾 Session saved for user {user_id}")
         return True
     except Exception as e:
+        mark_failure(e)
         logger.error(f"❌ Failed to save session for user {user_id}: {e}")
         return False
 
 async def get_session(user_id: int) -> dict:
-    """Get user session data from Valkey"""
+    """Get user session data from the user's Valkey record"""
     if not state.valkey_client:
         return {}
 
     try:
-        key = f"session:{user_id}"
-        data = await state.valkey_client.get(key)
+        key = f"user:{user_id}"
+        data = await run("HGET", key, "session")
         if data:
-            return orjson.loads(data)
+            return decode(data)
         return {}
     except Exception as e:
+        mark_failure(e)
         logger.error(f"❌ Failed to get session for user {user_id}: {e}")
         return {}
 
 async def delete_session(user_id: int):
-    """Delete user session from Valkey"""
+    """Delete user session from the user's Valkey record"""
     if not state.valkey_client:
         return False
 
     try:
-        key = f"session:{user_id}"
-        await state.valkey_client.delete(key)
+        key = f"user:{user_id}"
+        await run("HDEL", key, "session")
         logger.debug(f"🗑️ Session deleted for user {user_id}")
         return True
     except Exception as e:
+        mark_failure(e)
         logger.error(f"❌ Failed to delete session for user {user_id}: {e}")
-        return False
\ No newline at end of file
+        return False
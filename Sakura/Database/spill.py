@@ -0,0 +1,147 @@
+import asyncio
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from Sakura.Core.config import SPILL_PATH, OLD_CHAT
+from Sakura.Core.logging import logger
+from Sakura.Database.codec import encode, decode
+from Sakura.Services import metrics
+from Sakura import state
+
+# LOCAL SPILL STORE
+# While Valkey is down, conversations evicted from the in-memory fallback are written
+# to a SQLite file instead of being dropped. All disk work runs on one worker thread,
+# which keeps it off the event loop and applies writes and reads in submission order.
+# Conversations spilled more than OLD_CHAT seconds ago are stale, like their Valkey
+# counterparts, and are pruned instead of being restored.
+class SpillStore:
+    """SQLite-backed overflow for the in-memory conversation fallback"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.db = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sakura-spill")
+
+    @property
+    def enabled(self) -> bool:
+        return self.db is not None
+
+    def _open(self) -> None:
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS conversations (
+                user_id INTEGER PRIMARY KEY,
+                history BLOB NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.db.commit()
+
+    def _put(self, user_id: int, messages: list) -> None:
+        self.db.execute(
+            "INSERT OR REPLACE INTO conversations (user_id, history, updated_at) VALUES (?, ?, ?)",
+            (user_id, encode(messages), time.time())
+        )
+        self.db.commit()
+
+    def _take(self, user_id: int) -> list:
+        row = self.db.execute("SELECT history, updated_at FROM conversations WHERE user_id = ?", (user_id,)).fetchone()
+        if not row:
+            return None
+        self.db.execute("DELETE FROM conversations WHERE user_id = ?", (user_id,))
+        self.db.commit()
+        if row[1] < time.time() - OLD_CHAT:
+            metrics.increment("spill_expired")
+            return None
+        return decode(row[0])
+
+    def _prune(self) -> int:
+        pruned = self.db.execute("DELETE FROM conversations WHERE updated_at < ?", (time.time() - OLD_CHAT,)).rowcount
+        self.db.commit()
+        if pruned:
+            metrics.increment("spill_expired", pruned)
+        return pruned
+
+    def _list(self) -> list:
+        self._prune()
+        return [row[0] for row in self.db.execute("SELECT user_id FROM conversations")]
+
+    def _count(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def open(self) -> bool:
+        """Open the spill file and start receiving evicted conversations"""
+        if not self.path:
+            return False
+        try:
+            await self._run(self._open)
+            pruned = await self._run(self._prune)
+            state.conversation_history.on_evict = self.evict
+            logger.info(f"💽 Conversation spill store opened at {self.path} ({pruned} stale conversations pruned)")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to open conversation spill store at {self.path}: {e}")
+            self.db = None
+            return False
+
+    def evict(self, user_id: int, messages: list) -> None:
+        """Spill a conversation evicted from memory (called from the event loop)"""
+        metrics.increment("spill_writes")
+        # Submitted right away so a take() issued after this call always finds the row
+        future = self.executor.submit(self._put, user_id, messages)
+        future.add_done_callback(lambda done: self._report(done, user_id))
+
+    def _report(self, done, user_id: int) -> None:
+        if done.exception():
+            logger.error(f"❌ Failed to spill conversation for user {user_id}: {done.exception()}")
+
+    async def put(self, user_id: int, messages: list) -> None:
+        """Write a conversation to disk"""
+        try:
+            await self._run(self._put, user_id, messages)
+        except Exception as e:
+            logger.error(f"❌ Failed to spill conversation for user {user_id}: {e}")
+
+    async def take(self, user_id: int) -> list:
+        """Read a conversation back from disk and remove it there"""
+        if not self.enabled:
+            return None
+        try:
+            messages = await self._run(self._take, user_id)
+            if messages is not None:
+                metrics.increment("spill_reads")
+            return messages
+        except Exception as e:
+            logger.error(f"❌ Failed to read spilled conversation for user {user_id}: {e}")
+            return None
+
+    async def users(self) -> list:
+        """List the users that currently have a spilled conversation"""
+        if not self.enabled:
+            return []
+        return await self._run(self._list)
+
+    async def count(self) -> int:
+        if not self.enabled:
+            return 0
+        return await self._run(self._count)
+
+    async def close(self) -> None:
+        """Spill everything still in memory (if Valkey is down) and close the file"""
+        if not self.enabled:
+            return
+        if not state.valkey_client:
+            for user_id in state.conversation_history.keys():
+                await self.put(user_id, state.conversation_history.pop(user_id))
+        await self._run(self.db.close)
+        self.db = None
+        self.executor.shutdown(wait=False)
+        logger.info("✅ Conversation spill store closed")
+
+
+spill_store = SpillStore(SPILL_PATH)
@@ -1,32 +1,120 @@
+import asyncio
+import time
+from collections import deque
 from valkey.asyncio import Valkey as AsyncValkey
-from Sakura.Core.config import VALKEY_URL
+from valkey.exceptions import ConnectionError as ValkeyConnectionError, TimeoutError as ValkeyTimeoutError
+from Sakura.Core.config import (
+    VALKEY_URL,
+    VALKEY_FAILURE_THRESHOLD,
+    VALKEY_FAILURE_WINDOW,
+    VALKEY_PROBE_INTERVAL,
+)
 from Sakura.Core.logging import logger
 from Sakura import state
 
+# VALKEY CIRCUIT BREAKER
+# While tripped, state.valkey_client is None so every caller takes its memory fallback
+# immediately. The real client is parked in state.valkey_standby until a probe succeeds.
+OUTAGE_ERRORS = (ValkeyConnectionError, ValkeyTimeoutError, asyncio.TimeoutError, OSError)
+
+_failures = deque()
+breaker = {
+    "trips": 0,
+    "tripped_at": None,
+    "recovered_at": None,
+}
+
 async def connect_cache():
     """Initialize Valkey connection"""
     try:
-        state.valkey_client = AsyncValkey.from_url(
+        client = AsyncValkey.from_url(
             VALKEY_URL,
-            decode_responses=True,
+            decode_responses=False,
             socket_connect_timeout=5,
             socket_timeout=5,
             retry_on_timeout=True,
             health_check_interval=30
         )
-        await state.valkey_client.ping()
+    except Exception as e:
+        logger.error(f"❌ Failed to initialize Valkey client: {e}")
+        state.valkey_client = None
+        return False
+
+    try:
+        await client.ping()
+        state.valkey_client = client
         logger.info("✅ Valkey client initialized and connected successfully")
         return True
     except Exception as e:
-        logger.error(f"❌ Failed to initialize Valkey client: {e}")
+        logger.error(f"❌ Failed to connect to Valkey: {e}")
         state.valkey_client = None
+        trip_breaker(client)
         return False
 
+def mark_failure(error: Exception) -> None:
+    """Record a failed Valkey call and trip the breaker after repeated outages"""
+    if not isinstance(error, OUTAGE_ERRORS) or not state.valkey_client:
+        return
+
+    now = time.monotonic()
+    _failures.append(now)
+    while _failures and now - _failures[0] > VALKEY_FAILURE_WINDOW:
+        _failures.popleft()
+
+    if len(_failures) >= VALKEY_FAILURE_THRESHOLD:
+        client = state.valkey_client
+        state.valkey_client = None
+        trip_breaker(client)
+
+def trip_breaker(client: AsyncValkey) -> None:
+    """Switch to memory mode and start probing Valkey in the background"""
+    _failures.clear()
+    state.valkey_standby = client
+    breaker["trips"] += 1
+    breaker["tripped_at"] = time.time()
+    logger.warning("🔌 Valkey breaker tripped - switching to memory fallback")
+
+    if not state.valkey_probe_task or state.valkey_probe_task.done():
+        state.valkey_probe_task = asyncio.create_task(probe_cache())
+
+async def probe_cache():
+    """Ping the parked Valkey client until it answers, then restore it"""
+    from Sakura.Database.conversation import reconcile_history
+
+    while state.valkey_standby:
+        try:
+            await asyncio.sleep(VALKEY_PROBE_INTERVAL)
+            await asyncio.wait_for(state.valkey_standby.ping(), timeout=VALKEY_PROBE_INTERVAL)
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            logger.debug(f"🔌 Valkey still unavailable: {e}")
+            continue
+
+        client = state.valkey_standby
+        state.valkey_standby = None
+        state.valkey_client = client
+        breaker["recovered_at"] = time.time()
+        logger.info("✅ Valkey is reachable again - leaving memory fallback")
+        await reconcile_history()
+
+def breaker_status() -> str:
+    """Describe the current Valkey breaker state"""
+    if state.valkey_client:
+        return "connected"
+    if state.valkey_standby:
+        return "memory mode (probing)"
+    return "disabled"
+
 async def close_cache():
     """Close Valkey connection"""
-    if state.valkey_client:
+    if state.valkey_probe_task and not state.valkey_probe_task.done():
+        state.valkey_probe_task.cancel()
+    client = state.valkey_client or state.valkey_standby
+    state.valkey_standby = None
+    if client:
         try:
-            await state.valkey_client.aclose()
+            await client.aclose()
             logger.info("✅ Valkey connection closed")
         except Exception as e:
-            logger.error(f"❌ Error closing Valkey connection: {e}")
\ No newline at end of file
+            logger.error(f"❌ Error closing Valkey connection: {e}")
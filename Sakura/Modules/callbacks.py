@@ -1,6 +1,6 @@
 from pyrogram import Client, filters
 from pyrogram.types import CallbackQuery, LinkPreviewOptions
-from pyrogram.enums import ParseMode, ChatMemberStatus
+from pyrogram.enums import ParseMode, ChatMemberStatus, ChatType
 from pyrogram.errors import BadRequest, Forbidden
 from Sakura.Core.helpers import fetch_user, log_action, get_mention
 from Sakura.Modules.keyboards import info_menu, help_menu, broadcast_menu
@@ -40,11 +40,12 @@ async def start_callback_handler(client: Client, callback_query: CallbackQuery)
         elif callback_query.data == "start_hi":
             await callback_query.answer(START_MESSAGES["callback_answers"]["hi"], show_alert=False)
             await send_typing(client, callback_query.message.chat.id, user_info)
-            user_name = callback_query.from_user.first_name or ""
-            hi_response = await get_response("Hi sakura", user_name, user_info, callback_query.from_user.id)
+            hi_response = await get_response(
+                "Hi sakura", callback_query.from_user.id, user_info, turn_id=f"callback:{callback_query.id}"
+            )
 
-            if callback_query.message.chat.type == "private":
-                await send_effect(client, callback_query.message.chat.id, hi_response)
+            if callback_query.message.chat.type == ChatType.PRIVATE:
+                await send_effect(callback_query.message.chat.id, hi_response)
             else:
                 await client.send_message(chat_id=callback_query.message.chat.id, text=hi_response)
             log_action("INFO", "✅ Hi message sent from Sakura", user_info)
@@ -159,4 +159,22 @@ async def stats_command_handler(client: Client, message: Message) -> None:
     except Exception as e:
         user_info = fetch_user(message)
         log_action("ERROR", f"❌ Error in /stats command: {e}", user_info)
-        await message.reply_text("❌ Something went wrong getting bot statistics!")
\ No newline at end of file
+        await message.reply_text("❌ Something went wrong getting bot statistics!")
+
+@Client.on_message(filters.command("tokens") & filters.user(OWNER_ID))
+async def tokens_command_handler(client: Client, message: Message) -> None:
+    """Hidden owner command to show today's top token consumers"""
+    try:
+        user_info = fetch_user(message)
+        log_action("INFO", "🪙 /tokens command received from owner", user_info)
+        from Sakura.Services.usage import usage_report
+        await message.reply_text(
+            await usage_report(),
+            parse_mode=ParseMode.HTML,
+            link_preview_options=LinkPreviewOptions(is_disabled=True)
+        )
+        log_action("INFO", "✅ Token usage sent to owner", user_info)
+    except Exception as e:
+        user_info = fetch_user(message)
+        log_action("ERROR", f"❌ Error in /tokens command: {e}", user_info)
+        await message.reply_text("❌ Something went wrong getting token usage!")
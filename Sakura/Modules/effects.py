@@ -2,10 +2,13 @@ import random
 import aiohttp
 import orjson
 from pyrogram import Client
+from pyrogram.enums import ParseMode
 from pyrogram.types import Message, InlineKeyboardMarkup
 
-from Sakura.Core.config import BOT_TOKEN
+from Sakura.Core.config import BOT_TOKEN, BOT_API_TIMEOUT
 from Sakura.Core.logging import logger
+from Sakura.Services.resilience import CircuitBreaker, CircuitOpen
+from Sakura import state
 
 EFFECTS = [
     "5104841245755180586",
@@ -31,10 +34,34 @@ def serialize_reply_markup(reply_markup):
         return {"inline_keyboard": keyboard}
     return None
 
+# A plain "ok": false is a valid answer, only 5xx and 429 responses raise
+bot_api_breaker = CircuitBreaker("bot_api", BOT_API_TIMEOUT)
+
+async def _request(method: str, payload: dict) -> bool:
+    url = f"https://api.telegram.org/bot{BOT_TOKEN}/{method}"
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            url,
+            data=orjson.dumps(payload),
+            headers={'Content-Type': 'application/json'}
+        ) as response:
+            if response.status >= 500 or response.status == 429:
+                response.raise_for_status()
+            result = await response.json(loads=orjson.loads)
+            return result.get('ok', False)
+
+async def call_api(method: str, payload: dict, retries: int = 0) -> bool:
+    """
+    Call a Bot API method directly under the Bot API breaker.
+
+    Sending methods are not retried (a timed out send may still have been delivered),
+    idempotent ones can pass retries. Raises CircuitOpen while the breaker is open.
+    """
+    return await bot_api_breaker.call(lambda: _request(method, payload), retries=retries)
+
 async def send_effect(chat_id: int, text: str, reply_markup=None) -> bool:
-    """Send message with random effect using a direct API call."""
+    """Send message with random effect using a direct API call, or a plain message while the Bot API breaker is open."""
     try:
-        url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
         payload = {
             'chat_id': chat_id,
             'text': text,
@@ -43,37 +70,30 @@ async def send_effect(chat_id: int, text: str, reply_markup=None) -> bool:
         }
         if reply_markup:
             payload['reply_markup'] = serialize_reply_markup(reply_markup)
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                url,
-                data=orjson.dumps(payload),
-                headers={'Content-Type': 'application/json'}
-            ) as response:
-                result = await response.json(loads=orjson.loads)
-                return result.get('ok', False)
+        return await call_api("sendMessage", payload)
+    except CircuitOpen:
+        if not state.effects_client:
+            return False
+        await state.effects_client.send_message(chat_id, text, parse_mode=ParseMode.HTML, reply_markup=reply_markup)
+        return True
     except Exception as e:
         logger.error(f"❌ Effect error for {chat_id}: {e}")
         return False
 
 async def animate_reaction(chat_id: int, message_id: int, emoji: str) -> bool:
-    """Send animated emoji reaction using a direct API call."""
+    """Send animated emoji reaction using a direct API call, or a plain reaction while the Bot API breaker is open."""
     try:
-        url = f"https://api.telegram.org/bot{BOT_TOKEN}/setMessageReaction"
         payload = {
             'chat_id': chat_id,
             'message_id': message_id,
             'reaction': [{'type': 'emoji', 'emoji': emoji}],
             'is_big': True
         }
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                url,
-                data=orjson.dumps(payload),
-                headers={'Content-Type': 'application/json'}
-            ) as response:
-                result = await response.json(loads=orjson.loads)
-                return result.get('ok', False)
+        return await call_api("setMessageReaction", payload, retries=1)
+    except CircuitOpen:
+        if not state.effects_client:
+            return False
+        return await state.effects_client.send_reaction(chat_id, message_id, emoji=emoji)
     except Exception as e:
         logger.error(f"❌ Animated reaction error for {chat_id}: {e}")
         return False
@@ -87,9 +107,8 @@ async def add_reaction(client: Client, message: Message, emoji: str, user_info:
         log_action("WARNING", f"⚠️ Reaction fallback failed: {e}", user_info)
 
 async def photo_effect(chat_id: int, photo_url: str, caption: str, reply_markup=None) -> bool:
-    """Send photo message with random effect using a direct API call."""
+    """Send photo message with random effect using a direct API call, or a plain photo while the Bot API breaker is open."""
     try:
-        url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendPhoto"
         payload = {
             'chat_id': chat_id,
             'photo': photo_url,
@@ -99,15 +118,14 @@ async def photo_effect(chat_id: int, photo_url: str, caption: str, reply_markup=
         }
         if reply_markup:
             payload['reply_markup'] = serialize_reply_markup(reply_markup)
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                url,
-                data=orjson.dumps(payload),
-                headers={'Content-Type': 'application/json'}
-            ) as response:
-                result = await response.json(loads=orjson.loads)
-                return result.get('ok', False)
+        return await call_api("sendPhoto", payload)
+    except CircuitOpen:
+        if not state.effects_client:
+            return False
+        await state.effects_client.send_photo(
+            chat_id, photo_url, caption=caption, parse_mode=ParseMode.HTML, reply_markup=reply_markup
+        )
+        return True
     except Exception as e:
         logger.error(f"❌ Photo effect error for {chat_id}: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -1,24 +1,29 @@
 import asyncio
 import random
+import time
 from pyrogram import Client, filters
 from pyrogram.types import Message
 from pyrogram.enums import ChatAction
-from Sakura.Core.helpers import fetch_user, log_action, should_reply, get_error, log_response
-from Sakura.Services.limiter import check_limit
+from Sakura.Core.helpers import fetch_user, log_action, should_reply, get_error, get_turn
+from Sakura.Services.limiter import rate_limit, reject_blocked
 from Sakura.Modules.reactions import handle_reaction
 from Sakura.Chat.images import reply_image
 from Sakura.Chat.polls import reply_poll
 from Sakura.Modules.typing import send_typing
 from Sakura.Chat.chat import get_response
+from Sakura.Chat.streaming import StreamReply
+from Sakura.Chat.phrases import quick_reply
 from Sakura.Chat.voice import generate_voice
-from Sakura.Database.cache import set_last_message, get_last_message
+from Sakura.Database.records import load_record, save_record
 from Sakura.Services.broadcast import execute_broadcast
 from Sakura import state
-from Sakura.Core.config import OWNER_ID
+from Sakura.Core.config import OWNER_ID, DEBOUNCE_DELAY
 from Sakura.Modules.stickers import handle_sticker
 from Sakura.Modules.image import handle_image
 from Sakura.Modules.poll import handle_poll
 from Sakura.Services.tracking import track_user
+from Sakura.Services import metrics
+from Sakura.Services.debounce import coalesce
 
 @Client.on_message(
     (filters.text | filters.sticker | filters.voice | filters.video_note |
@@ -47,8 +52,26 @@ async def handle_messages(client: Client, message: Message) -> None:
             log_action("DEBUG", "🚫 Not responding to group message (no mention/reply)", user_info)
             return
 
-        if await check_limit(user_id, user_info["chat_id"]):
-            log_action("WARNING", "⏱️ Rate limited - ignoring message", user_info)
+        received = time.perf_counter()
+        burst_text = None
+        if DEBOUNCE_DELAY and message.text:
+            # Blocked pairs must not be able to keep a burst open
+            retry_after = await reject_blocked(user_id, user_info["chat_id"])
+            if retry_after:
+                log_action("WARNING", f"⏱️ Rate limited - ignoring message (retry in {retry_after:.1f}s)", user_info)
+                return
+            burst = await coalesce(message)
+            if burst is None:
+                log_action("DEBUG", "🧺 Message merged into a pending burst", user_info)
+                return
+            if len(burst) > 1:
+                log_action("INFO", f"🧺 Answering a burst of {len(burst)} messages at once", user_info)
+                message = burst[-1]
+                burst_text = "\n".join(msg.text for msg in burst)
+
+        limited, retry_after = await rate_limit(user_id, user_info["chat_id"])
+        if limited:
+            log_action("WARNING", f"⏱️ Rate limited - ignoring message (retry in {retry_after:.1f}s)", user_info)
             return
 
         asyncio.create_task(handle_reaction(client, message, user_info))
@@ -64,11 +87,13 @@ async def handle_messages(client: Client, message: Message) -> None:
             return
 
         # Default to text-based handling
-        user_message = message.text or message.caption or "Media message"
+        user_message = burst_text or message.text or message.caption or "Media message"
         log_action("INFO", f"💬 Text/media message received: '{user_message[:100]}...'", user_info)
 
+        record = await load_record(user_id)
+
         if "in your voice" in user_message.lower():
-            last_bot_message = await get_last_message(user_id)
+            last_bot_message = record.last_message
             if last_bot_message:
                 log_action("INFO", "🎤 User requested last message in voice", user_info)
                 await client.send_chat_action(chat_id=message.chat.id, action=ChatAction.RECORD_AUDIO)
@@ -87,28 +112,45 @@ async def handle_messages(client: Client, message: Message) -> None:
         if await reply_poll(client, message, user_message, user_info):
             return
 
-        await send_typing(client, message.chat.id, user_info)
-        ai_response = await get_response(user_message, user_id, user_info)
-
-        await set_last_message(user_id, ai_response)
+        pooled = quick_reply(user_message)
+        if pooled:
+            await message.reply_text(pooled)
+            metrics.observe("ttft_full", time.perf_counter() - received)
+            record.stage_turn(user_message, pooled, get_turn(message))
+            record.mark_response()
+            await save_record(record)
+            log_action("INFO", "⚡ Answered hot phrase from the reply pool", user_info)
+            return
 
-        log_action("DEBUG", f"📤 Sending response: '{ai_response[:50]}...'", user_info)
+        await send_typing(client, message.chat.id, user_info)
 
-        voice_data = None
+        # Voice replies need the whole text anyway, so only text replies are streamed
         if random.random() < 0.1:  # 10% chance
+            ai_response = await get_response(user_message, user_id, user_info, turn_id=get_turn(message), record=record)
             log_action("INFO", "🎤 Attempting to send response as voice (10% chance)", user_info)
             await client.send_chat_action(chat_id=message.chat.id, action=ChatAction.RECORD_AUDIO)
             voice_data = await generate_voice(ai_response)
-
-        if voice_data:
-            await message.reply_voice(voice=voice_data)
-            log_action("INFO", "✅ Voice message response sent successfully", user_info)
+            if voice_data:
+                await message.reply_voice(voice=voice_data)
+                log_action("INFO", "✅ Voice message response sent successfully", user_info)
+            else:
+                await message.reply_text(ai_response)
+                metrics.observe("ttft_full", time.perf_counter() - received)
+                log_action("INFO", "✅ Text message response sent successfully", user_info)
         else:
-            await message.reply_text(ai_response)
+            stream = StreamReply(message, received)
+            ai_response = await get_response(user_message, user_id, user_info, turn_id=get_turn(message), record=record, on_text=stream.update)
+            log_action("DEBUG", f"📤 Sending response: '{ai_response[:50]}...'", user_info)
+            if stream.reply is None:
+                await message.reply_text(ai_response)
+                metrics.observe("ttft_full", time.perf_counter() - received)
+            else:
+                await stream.finish(ai_response)
             log_action("INFO", "✅ Text message response sent successfully", user_info)
 
-        await log_response(user_id)
-        log_action("DEBUG", "⏰ Updated user response time", user_info)
+        record.mark_response()
+        await save_record(record)
+        log_action("DEBUG", "⏰ Saved turn and updated user response time", user_info)
 
     except Exception as e:
         user_info = fetch_user(message)
@@ -1,11 +1,12 @@
 import random
 from pyrogram import Client
 from pyrogram.types import Message
-from Sakura.Core.helpers import fetch_user, log_action, get_error
+from Sakura.Core.helpers import fetch_user, log_action, get_error, get_turn
 from Sakura.Modules.reactions import CONTEXTUAL_REACTIONS
 from Sakura.Modules.effects import animate_reaction
 from Sakura.Modules.typing import send_typing
 from Sakura.Chat.chat import get_response
+from Sakura.Chat.media import describe_image
 
 async def handle_image(client: Client, message: Message) -> None:
     """Handle image messages with AI analysis"""
@@ -26,14 +27,17 @@ async def handle_image(client: Client, message: Message) -> None:
     await send_typing(client, message.chat.id, user_info)
 
     try:
-        log_action("DEBUG", "📥 Downloading image...", user_info)
-        image_file = await client.download_media(message.photo.file_id, in_memory=True)
-        image_bytes = image_file.getvalue()
-        log_action("DEBUG", f"📥 Image downloaded: {len(image_bytes)} bytes", user_info)
+        log_action("DEBUG", f"🖼️ Describing image {message.photo.file_unique_id}", user_info)
+        description = await describe_image(client, message.photo)
+        if not description:
+            await message.reply_text(get_error())
+            return
 
         caption = message.caption or ""
 
-        response = await get_response(caption, message.from_user.id, user_info, image_bytes=image_bytes)
+        response = await get_response(
+            caption, message.from_user.id, user_info, turn_id=get_turn(message), image_description=description
+        )
 
         log_action("DEBUG", f"📤 Sending image analysis: '{response[:50]}...'", user_info)
         await message.reply_text(response)
@@ -123,6 +123,14 @@ It will be automatically broadcasted to all groups.
     }
 }
 
+# Poll answers, rendered from a cached neutral {option} and {reason}
+POLL_ANSWERS = [
+    "Mujhe lagta hai {option} sahi hai 🌸 {reason}",
+    "{option} hona chahiye 💭 {reason}",
+    "Mere hisaab se {option} ✨ {reason}",
+    "Answer {option} hai na? 🌸 {reason}"
+]
+
 # Fallback responses for when API is unavailable or errors occur
 RESPONSES = [
     "🙃"
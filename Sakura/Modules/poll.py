@@ -1,7 +1,7 @@
 import random
 from pyrogram import Client
 from pyrogram.types import Message
-from Sakura.Core.helpers import fetch_user, log_action, get_error
+from Sakura.Core.helpers import fetch_user, log_action, get_error, get_turn
 from Sakura.Modules.reactions import CONTEXTUAL_REACTIONS
 from Sakura.Modules.effects import animate_reaction
 from Sakura.Modules.typing import send_typing
@@ -32,7 +32,7 @@ async def handle_poll(client: Client, message: Message) -> None:
         poll_options = [opt.text.encode('utf-8', 'ignore').decode('utf-8') for opt in poll.options]
         log_action("DEBUG", f"📊 Poll question: '{poll_question}' with {len(poll_options)} options", user_info)
 
-        response = await analyze_poll(poll_question, poll_options, user_info, message.from_user.id)
+        response = await analyze_poll(poll_question, poll_options, user_info, message.from_user.id, get_turn(message))
 
         log_action("DEBUG", f"📤 Sending poll analysis: '{response[:50]}...'", user_info)
         await message.reply_text(response)
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from collections import deque
+from Sakura.Core.config import GEMINI_CONCURRENCY, GEMINI_QUEUE_SIZE, GEMINI_QUEUE_TIMEOUT
+from Sakura.Services import metrics
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of admitted"""
+
+
+# ADMISSION CONTROL
+# At most `limit` requests run at once, up to `queue_size` more wait in FIFO order and
+# each waiter gives up after `timeout` seconds. Anything beyond that is shed right away,
+# so admitted requests never wait behind an unbounded backlog.
+class AdmissionController:
+    """Concurrency limit with a bounded, deadline-aware wait queue"""
+
+    def __init__(self, name: str, limit: int, queue_size: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self.waiters = deque()
+
+    def _publish(self) -> None:
+        metrics.set_gauge(f"{self.name}_active", self.active)
+        metrics.set_gauge(f"{self.name}_queue", len(self.waiters))
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free right now (for background work)"""
+        if self.active >= self.limit or self.waiters:
+            return False
+        self.active += 1
+        self._publish()
+        return True
+
+    async def acquire(self) -> None:
+        """Wait for a slot, raising Overloaded when the queue is full or the deadline passes"""
+        if self.try_acquire():
+            metrics.observe(f"{self.name}_wait", 0.0)
+            return
+
+        if len(self.waiters) >= self.queue_size:
+            metrics.increment(f"{self.name}_shed")
+            raise Overloaded(f"{self.name} queue is full")
+
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append(future)
+        self._publish()
+        try:
+            await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            metrics.increment(f"{self.name}_timeouts")
+            raise Overloaded(f"{self.name} queue wait exceeded {self.timeout}s")
+        except asyncio.CancelledError:
+            # The slot may have been handed over right before the cancellation
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        finally:
+            if future in self.waiters:
+                self.waiters.remove(future)
+            self._publish()
+        metrics.observe(f"{self.name}_wait", time.perf_counter() - started)
+
+    def release(self) -> None:
+        """Hand the slot to the oldest live waiter or free it"""
+        while self.waiters:
+            future = self.waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                self._publish()
+                return
+        self.active -= 1
+        self._publish()
+
+
+gemini_admission = AdmissionController("gemini", GEMINI_CONCURRENCY, GEMINI_QUEUE_SIZE, GEMINI_QUEUE_TIMEOUT)
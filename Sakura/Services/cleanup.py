@@ -1,35 +1,28 @@
 import asyncio
-import time
 from Sakura.Core.logging import logger
-from Sakura.Core.config import OLD_CHAT, CHAT_CLEANUP
+from Sakura.Core.config import EXPIRY_TICK
+from Sakura.Services.expiry import expiry_index
+from Sakura.Services.limiter import local_limiter
 from Sakura import state
 
+def expire_conversation(user_id: int) -> None:
+    """Drop a user's in-memory conversation state after OLD_CHAT seconds idle"""
+    state.conversation_history.pop(user_id)
+    state.conversation_turns.pop(user_id, None)
+    state.user_last_response_time.pop(user_id, None)
+
+expiry_index.register("conversation", expire_conversation)
+expiry_index.register("rate_limit", local_limiter.forget)
+
 async def cleanup_conversations():
-    """Clean up old conversation histories and response times periodically"""
+    """Expire idle in-memory conversations and rate limit entries"""
     logger.info("🧹 Conversation cleanup task started")
 
     while True:
         try:
-            current_time = time.time()
-            conversations_cleaned = 0
-
-            # Iterate over a copy of conversation history keys to allow deletion
-            for user_id in list(state.conversation_history.keys()):
-                last_response_time = state.user_last_response_time.get(user_id)
-
-                # Clean up if response time is recorded and it's expired
-                if last_response_time is not None and \
-                   (current_time - last_response_time > OLD_CHAT):
-                    if user_id in state.conversation_history:
-                        del state.conversation_history[user_id]
-                        conversations_cleaned += 1
-                    if user_id in state.user_last_response_time:
-                        del state.user_last_response_time[user_id]
-
-            if conversations_cleaned > 0:
-                logger.info(f"🧹 Cleaned {conversations_cleaned} old conversations")
-
-            logger.debug(f"📊 Active conversations: {len(state.conversation_history)}")
+            expired = expiry_index.expire()
+            if expired > 0:
+                logger.info(f"🧹 Expired {expired} idle in-memory entries")
 
         except asyncio.CancelledError:
             logger.info("🧹 Cleanup task cancelled - shutting down gracefully")
@@ -38,7 +31,7 @@ async def cleanup_conversations():
             logger.error(f"❌ Error in conversation cleanup: {e}")
 
         try:
-            await asyncio.sleep(CHAT_CLEANUP)
+            await asyncio.sleep(EXPIRY_TICK)
         except asyncio.CancelledError:
             logger.info("🧹 Cleanup task sleep cancelled - shutting down")
-            break
\ No newline at end of file
+            break
@@ -0,0 +1,67 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+from pyrogram.types import Message
+from Sakura.Core.config import BURST_LIMIT, DEBOUNCE_DELAY, DEBOUNCE_MAX_WAIT
+from Sakura.Core.logging import logger
+from Sakura.Services import metrics
+from Sakura.Services.limiter import escalate
+
+class _Burst:
+    __slots__ = ("messages", "arrived", "flooded")
+
+    def __init__(self, message: Message):
+        self.messages = [message]
+        self.arrived = asyncio.Event()
+        self.flooded = False
+
+
+_bursts: Dict[str, _Burst] = {}
+
+# BURST COALESCING
+# The first message of a (user, chat) pair opens a burst and waits DEBOUNCE_DELAY after
+# the latest arrival (DEBOUNCE_MAX_WAIT at most). Messages arriving meanwhile join the
+# burst and their handlers return; the opener answers all of them with one AI call.
+# A burst going past BURST_LIMIT messages escalates the pair to a hard rate limit block,
+# so the opener's limiter check rejects it and later messages are rejected up front.
+async def coalesce(message: Message) -> Optional[List[Message]]:
+    """
+    Merge a message into its (user, chat) burst.
+
+    Returns:
+        All messages of the burst for the handler that opened it, None for messages
+        that joined a burst another handler will answer.
+    """
+    key = f"{message.from_user.id}:{message.chat.id}"
+    burst = _bursts.get(key)
+    if burst:
+        if len(burst.messages) < BURST_LIMIT:
+            burst.messages.append(message)
+            metrics.increment("debounce_merged")
+        elif not burst.flooded:
+            burst.flooded = True
+            metrics.increment("debounce_floods")
+            logger.warning(f"🌊 Burst from {key} went past {BURST_LIMIT} messages, hard blocking the pair")
+            await escalate(message.from_user.id, message.chat.id)
+        burst.arrived.set()
+        return None
+
+    burst = _bursts[key] = _Burst(message)
+    started = time.perf_counter()
+    deadline = time.monotonic() + DEBOUNCE_MAX_WAIT
+    try:
+        while not burst.flooded:
+            burst.arrived.clear()
+            timeout = min(DEBOUNCE_DELAY, deadline - time.monotonic())
+            if timeout <= 0:
+                break
+            try:
+                await asyncio.wait_for(burst.arrived.wait(), timeout)
+            except asyncio.TimeoutError:
+                break
+    finally:
+        del _bursts[key]
+
+    metrics.increment("debounce_bursts")
+    metrics.observe("debounce_wait", time.perf_counter() - started)
+    return burst.messages
@@ -0,0 +1,76 @@
+import heapq
+import time
+from typing import Callable, Dict
+from Sakura.Core.logging import logger
+from Sakura.Services import metrics
+
+# EXPIRY INDEX
+# In-memory per-user structures register a namespace and an expiry handler, then touch
+# keys as they are used. A min-heap orders keys by deadline; touching only moves the
+# deadline in a dict (a new heap entry is needed only when it moves earlier), and a popped
+# key whose deadline moved later is pushed back once. A tick therefore only looks at
+# entries that are due, never at idle ones.
+class ExpiryIndex:
+    """Min-heap of key deadlines shared by all in-memory per-user state"""
+
+    def __init__(self):
+        self.heap = []
+        self.deadlines: Dict[tuple, float] = {}
+        self.scheduled: Dict[tuple, float] = {}
+        self.handlers: Dict[str, Callable] = {}
+
+    def register(self, namespace: str, handler: Callable[[any], None]) -> None:
+        """Register the function that drops a namespace's key once it expires"""
+        self.handlers[namespace] = handler
+
+    def touch(self, namespace: str, key: any, ttl: float) -> None:
+        """Push a key's deadline ttl seconds into the future"""
+        entry = (namespace, key)
+        deadline = time.monotonic() + ttl
+        self.deadlines[entry] = deadline
+        scheduled = self.scheduled.get(entry)
+        if scheduled is None or deadline < scheduled:
+            self._schedule(entry, deadline)
+
+    def _schedule(self, entry: tuple, deadline: float) -> None:
+        self.scheduled[entry] = deadline
+        heapq.heappush(self.heap, (deadline, *entry))
+
+    def discard(self, namespace: str, key: any) -> None:
+        """Forget a key that was removed by other means"""
+        self.deadlines.pop((namespace, key), None)
+
+    def expire(self) -> int:
+        """Run the handlers of every key that is due, returns how many expired"""
+        now = time.monotonic()
+        expired = 0
+        while self.heap and self.heap[0][0] <= now:
+            popped, namespace, key = heapq.heappop(self.heap)
+            entry = (namespace, key)
+            if self.scheduled.get(entry) != popped:
+                continue  # superseded by an earlier deadline
+            del self.scheduled[entry]
+            deadline = self.deadlines.get(entry)
+            if deadline is None:
+                continue
+            if deadline > now:
+                self._schedule(entry, deadline)
+                continue
+
+            del self.deadlines[entry]
+            try:
+                self.handlers[namespace](key)
+            except Exception as e:
+                logger.error(f"❌ Expiry handler for {namespace} failed on {key}: {e}")
+            metrics.increment(f"expired_{namespace}")
+            expired += 1
+
+        metrics.increment("expired_total", expired)
+        metrics.set_gauge("expiry_pending", len(self.deadlines))
+        return expired
+
+    def __len__(self) -> int:
+        return len(self.deadlines)
+
+
+expiry_index = ExpiryIndex()
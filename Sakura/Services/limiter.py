@@ -1,60 +1,229 @@
 import time
-from Sakura.Core.config import MESSAGE_LIMIT, RATE_LIMIT_COUNT, RATE_LIMIT_TTL
+from array import array
+from collections import OrderedDict
+from typing import Tuple
+from Sakura.Core.config import MESSAGE_LIMIT, RATE_LIMIT_COUNT, RATE_LIMIT_TTL, RATE_LIMIT_ALGORITHM, RATE_LIMIT_LOCAL_SIZE
 from Sakura.Core.logging import logger
+from Sakura.Database.valkey import mark_failure
+from Sakura.Database.pipeline import run
+from Sakura.Services.expiry import expiry_index
+from Sakura.Services import metrics
 from Sakura import state
 
-async def check_limit(user_id: int, chat_id: int) -> bool:
-    """
-    Checks if a user is rate-limited based on a per-user, per-chat basis.
-    """
-    if state.valkey_client:
-        try:
-            hard_limit_key = f"hard_rate_limit:{user_id}:{chat_id}"
-            if await state.valkey_client.exists(hard_limit_key):
-                return True
+# Fixed window: more than one message per window is limited, more than
+# RATE_LIMIT_COUNT escalates to a hard block. Returns {limited, retry_after_ms}.
+WINDOW_LIMIT_SCRIPT = """
+local blocked = redis.call('PTTL', KEYS[1])
+if blocked > 0 then
+    return {1, blocked}
+end
+local count = redis.call('INCR', KEYS[2])
+if count == 1 then
+    redis.call('PEXPIRE', KEYS[2], ARGV[1])
+end
+if count > tonumber(ARGV[2]) then
+    redis.call('SET', KEYS[1], '1', 'PX', ARGV[3])
+    return {1, tonumber(ARGV[3])}
+end
+if count > 1 then
+    return {1, math.max(redis.call('PTTL', KEYS[2]), 0)}
+end
+return {0, 0}
+"""
 
-            message_count_key = f"message_count:{user_id}:{chat_id}"
-            pipe = state.valkey_client.pipeline()
-            pipe.incr(message_count_key)
-            pipe.ttl(message_count_key)
-            results = await pipe.execute()
+# GCRA: one message per emission interval (ARGV[1]), tracked as a theoretical arrival
+# time. Rejected messages are counted per interval window and RATE_LIMIT_COUNT of them
+# escalate to a hard block. Returns {limited, retry_after_ms}.
+GCRA_LIMIT_SCRIPT = """
+local blocked = redis.call('PTTL', KEYS[1])
+if blocked > 0 then
+    return {1, blocked}
+end
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local tat = tonumber(redis.call('GET', KEYS[2]) or now)
+if tat <= now then
+    redis.call('SET', KEYS[2], math.max(tat, now) + interval, 'PX', interval)
+    return {0, 0}
+end
+local strikes = redis.call('INCR', KEYS[3])
+if strikes == 1 then
+    redis.call('PEXPIRE', KEYS[3], interval)
+end
+if strikes + 1 > tonumber(ARGV[2]) then
+    redis.call('SET', KEYS[1], '1', 'PX', ARGV[3])
+    return {1, tonumber(ARGV[3])}
+end
+return {1, tat - now}
+"""
 
-            count = results[0]
-            ttl = results[1]
+_limit_script = None
 
-            if ttl == -1:
-                await state.valkey_client.expire(message_count_key, int(MESSAGE_LIMIT))
+# LOCAL TIER
+# Every (user, chat) pair seen recently gets a slot in a set of flat arrays holding a
+# one-message token bucket, a block deadline and a strike count. Blocked pairs are
+# rejected here without touching Valkey, and the same buckets serve as the limiter
+# while Valkey is down. The least recently used pair gives up its slot when full.
+class LocalLimiter:
+    """Bounded per-(user, chat) token buckets and block deadlines in compact arrays"""
 
-            if count > RATE_LIMIT_COUNT:
-                await state.valkey_client.setex(hard_limit_key, RATE_LIMIT_TTL, "1")
-                return True
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.slots = OrderedDict()
+        self.free = list(range(capacity - 1, -1, -1))
+        self.tokens = array("d", [0.0]) * capacity
+        self.updated = array("d", [0.0]) * capacity
+        self.blocked_until = array("d", [0.0]) * capacity
+        self.strikes = array("I", [0]) * capacity
 
-            if count > 1:
-                return True
+    def _slot(self, key: str, now: float) -> int:
+        slot = self.slots.get(key)
+        if slot is not None:
+            self.slots.move_to_end(key)
+            return slot
 
-            return False
+        if self.free:
+            slot = self.free.pop()
+        else:
+            _, slot = self.slots.popitem(last=False)
+            metrics.increment("rate_limit_local_evictions")
+        self.tokens[slot] = 1.0
+        self.updated[slot] = now
+        self.blocked_until[slot] = 0.0
+        self.strikes[slot] = 0
+        self.slots[key] = slot
+        return slot
 
-        except Exception as e:
-            logger.error(f"❌ Valkey rate limit check failed for user {user_id}:{chat_id}: {e}. Falling back to memory.")
+    def check(self, key: str, now: float) -> Tuple[float, bool]:
+        """
+        Reject a pair that is still blocked, counting the attempt as a strike.
+
+        Returns:
+            Seconds until the block ends (0 if not blocked) and whether this attempt
+            escalated the block to a hard block.
+        """
+        slot = self.slots.get(key)
+        if slot is None or self.blocked_until[slot] <= now:
+            return 0.0, False
+
+        self.strikes[slot] += 1
+        if self.strikes[slot] + 1 > RATE_LIMIT_COUNT and self.blocked_until[slot] < now + RATE_LIMIT_TTL / 2:
+            self.blocked_until[slot] = now + RATE_LIMIT_TTL
+            return RATE_LIMIT_TTL, True
+        return self.blocked_until[slot] - now, False
+
+    def block(self, key: str, now: float, retry_after: float) -> None:
+        """Remember a block decided elsewhere (by the Valkey script)"""
+        slot = self._slot(key, now)
+        if self.blocked_until[slot] <= now:
+            self.strikes[slot] = 1
+        self.blocked_until[slot] = now + retry_after
+
+    def hit(self, key: str, now: float) -> Tuple[bool, float]:
+        """Spend a token for one message, blocking the pair until the next token if empty"""
+        slot = self._slot(key, now)
+        tokens = min(1.0, self.tokens[slot] + (now - self.updated[slot]) / MESSAGE_LIMIT)
+        self.updated[slot] = now
+        if tokens >= 1.0:
+            self.tokens[slot] = tokens - 1.0
+            self.strikes[slot] = 0
+            return False, 0.0
+
+        self.tokens[slot] = tokens
+        retry_after = (1.0 - tokens) * MESSAGE_LIMIT
+        self.blocked_until[slot] = now + retry_after
+        self.strikes[slot] = 1
+        return True, retry_after
+
+    def forget(self, key: str) -> None:
+        slot = self.slots.pop(key, None)
+        if slot is not None:
+            self.free.append(slot)
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+
+local_limiter = LocalLimiter(RATE_LIMIT_LOCAL_SIZE)
+
+def _limit_keys(user_id: int, chat_id: int) -> list:
+    keys = [f"hard_rate_limit:{user_id}:{chat_id}", f"message_count:{user_id}:{chat_id}"]
+    if RATE_LIMIT_ALGORITHM == "gcra":
+        keys.append(f"rate_strikes:{user_id}:{chat_id}")
+    return keys
 
+async def _share_block(user_id: int, chat_id: int) -> None:
+    """Publish a locally decided hard block so every instance enforces it"""
+    if not state.valkey_client:
+        return
+    try:
+        await run("SET", f"hard_rate_limit:{user_id}:{chat_id}", "1", "PX", RATE_LIMIT_TTL * 1000)
+    except Exception as e:
+        mark_failure(e)
+        logger.error(f"❌ Failed to share hard rate limit for user {user_id}:{chat_id}: {e}")
+
+async def reject_blocked(user_id: int, chat_id: int) -> float:
+    """
+    Reject a pair that is already blocked, without a Valkey round trip.
+
+    The attempt counts as a strike and can escalate to a hard block.
+
+    Returns:
+        Seconds until the block ends, 0 if the pair is not blocked.
+    """
     key = f"{user_id}:{chat_id}"
-    current_time = time.time()
+    expiry_index.touch("rate_limit", key, max(MESSAGE_LIMIT, RATE_LIMIT_TTL))
+    retry_after, escalated = local_limiter.check(key, time.monotonic())
+    if retry_after:
+        metrics.increment("rate_limit_local_rejects")
+        if escalated:
+            await _share_block(user_id, chat_id)
+    return retry_after
+
+async def escalate(user_id: int, chat_id: int) -> None:
+    """Hard block a pair right away (for floods caught before the limiter)"""
+    local_limiter.block(f"{user_id}:{chat_id}", time.monotonic(), RATE_LIMIT_TTL)
+    metrics.increment("rate_limit_escalations")
+    await _share_block(user_id, chat_id)
+
+async def rate_limit(user_id: int, chat_id: int) -> Tuple[bool, float]:
+    """
+    Decide whether a user's message in a chat is rate limited.
 
-    if key in state.rate_limited_users and current_time < state.rate_limited_users[key]:
-        return True
-    elif key in state.rate_limited_users:
-        del state.rate_limited_users[key]
+    Pairs already known to be blocked are rejected locally. Otherwise the decision
+    is a single atomic script call on Valkey, or the local token bucket without it.
 
-    timestamps = state.user_message_counts.get(key, [])
-    timestamps = [ts for ts in timestamps if current_time - ts < MESSAGE_LIMIT]
-    timestamps.append(current_time)
-    state.user_message_counts[key] = timestamps
+    Returns:
+        Whether the message is limited and the seconds until the next one is allowed.
+    """
+    global _limit_script
+    retry_after = await reject_blocked(user_id, chat_id)
+    if retry_after:
+        return True, retry_after
+
+    key = f"{user_id}:{chat_id}"
+    now = time.monotonic()
+
+    if state.valkey_client:
+        started = time.perf_counter()
+        try:
+            if _limit_script is None:
+                script = GCRA_LIMIT_SCRIPT if RATE_LIMIT_ALGORITHM == "gcra" else WINDOW_LIMIT_SCRIPT
+                _limit_script = state.valkey_client.register_script(script)
 
-    if len(timestamps) > RATE_LIMIT_COUNT:
-        state.rate_limited_users[key] = current_time + RATE_LIMIT_TTL
-        return True
+            limited, retry_ms = await _limit_script(
+                keys=_limit_keys(user_id, chat_id),
+                args=[int(MESSAGE_LIMIT * 1000), RATE_LIMIT_COUNT, RATE_LIMIT_TTL * 1000],
+                client=state.valkey_client
+            )
+            metrics.observe("rate_limit_check", time.perf_counter() - started)
+            if limited:
+                local_limiter.block(key, now, retry_ms / 1000)
+            return bool(limited), retry_ms / 1000
 
-    if len(timestamps) > 1:
-        return True
+        except Exception as e:
+            mark_failure(e)
+            logger.error(f"❌ Valkey rate limit check failed for user {user_id}:{chat_id}: {e}. Falling back to memory.")
 
-    return False
\ No newline at end of file
+    return local_limiter.hit(key, now)
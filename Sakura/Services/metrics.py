@@ -0,0 +1,49 @@
+from collections import deque
+from typing import Dict
+
+# IN-PROCESS METRICS
+# Counters only ever go up, gauges hold the latest value and samples keep a bounded
+# window of recent observations (latencies in seconds, sizes in bytes or tokens).
+SAMPLE_WINDOW = 1024
+
+counters: Dict[str, int] = {}
+gauges: Dict[str, float] = {}
+samples: Dict[str, deque] = {}
+
+def increment(name: str, value: int = 1) -> None:
+    """Increase a counter"""
+    counters[name] = counters.get(name, 0) + value
+
+def set_gauge(name: str, value: float) -> None:
+    """Set a gauge to its current value"""
+    gauges[name] = value
+
+def observe(name: str, value: float) -> None:
+    """Record one observation of a distribution"""
+    window = samples.get(name)
+    if window is None:
+        window = samples[name] = deque(maxlen=SAMPLE_WINDOW)
+    window.append(value)
+
+def percentile(name: str, pct: float, default: float = None) -> float:
+    """Get a percentile (0-100) of the recent observations"""
+    window = samples.get(name)
+    if not window:
+        return default
+    ordered = sorted(window)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+def ratio(hits: str, misses: str) -> str:
+    """Format a hit rate from two counters"""
+    total = counters.get(hits, 0) + counters.get(misses, 0)
+    if not total:
+        return "N/A"
+    return f"{counters.get(hits, 0) / total * 100:.1f}%"
+
+def latency(name: str) -> str:
+    """Format p50/p99 of a latency distribution in milliseconds"""
+    p50 = percentile(name, 50)
+    if p50 is None:
+        return "N/A"
+    return f"{p50 * 1000:.0f}ms / {percentile(name, 99) * 1000:.0f}ms"
@@ -0,0 +1,182 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+import aiohttp
+import httpx
+from Sakura.Core.config import (
+    BREAKER_WINDOW,
+    BREAKER_MIN_CALLS,
+    BREAKER_FAILURE_RATE,
+    BREAKER_COOLDOWN,
+    RETRY_BASE_DELAY,
+)
+from Sakura.Core.logging import logger
+from Sakura.Services import metrics
+from Sakura.Services.admission import Overloaded
+
+CLOSED = 0
+HALF_OPEN = 1
+OPEN = 2
+STATE_NAMES = {CLOSED: "closed", HALF_OPEN: "half-open", OPEN: "open"}
+
+class CircuitOpen(Overloaded):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+
+# Connection level failures of the SDKs (httpx) and raw Bot API calls (aiohttp)
+NETWORK_ERRORS = (OSError, httpx.TransportError, aiohttp.ClientConnectionError)
+
+def status_code(error: Exception) -> Optional[int]:
+    """HTTP status of an API error from any of the clients, if it has one"""
+    for attribute in ("status_code", "status", "code"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+def is_outage(error: Exception) -> bool:
+    """Network errors, deadlines, 5xx and 429 count against a breaker, bad requests and bugs do not"""
+    if isinstance(error, NETWORK_ERRORS):
+        return True
+    code = status_code(error)
+    return code is not None and (code >= 500 or code == 429)
+
+def is_retryable(error: Exception) -> bool:
+    """Only network errors and 5xx are repeated, a missed deadline is not"""
+    if isinstance(error, asyncio.TimeoutError):
+        return False
+    if isinstance(error, NETWORK_ERRORS):
+        return True
+    code = status_code(error)
+    return code is not None and code >= 500
+
+
+breakers: Dict[str, "CircuitBreaker"] = {}
+
+# OUTBOUND CALL RESILIENCE
+# Every call to an external API runs under a per-dependency deadline that covers all of
+# its attempts. The outcomes of the last BREAKER_WINDOW calls are kept, and outages or
+# calls slower than `slow_call` count as failures. Once BREAKER_FAILURE_RATE of them fail
+# the breaker opens and callers get CircuitOpen right away for BREAKER_COOLDOWN seconds.
+# After that a single probe call decides whether it closes again. Network errors and 5xx
+# are retried with jittered backoff while the deadline allows.
+class CircuitBreaker:
+    """Deadline, error-rate/latency breaker and bounded retries for one dependency"""
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        slow_call: Optional[float] = None,
+        retries: int = 1,
+        failure: Optional[Callable[[Exception], bool]] = None,
+        retryable: Optional[Callable[[Exception], bool]] = None
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.slow_call = slow_call or timeout
+        self.retries = retries
+        self.failure = failure or is_outage
+        self.retryable = retryable or is_retryable
+        self.outcomes = deque(maxlen=BREAKER_WINDOW)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.trips = 0
+        breakers[name] = self
+
+    @property
+    def status(self) -> str:
+        return STATE_NAMES[self.state]
+
+    def _set_state(self, value: int) -> None:
+        self.state = value
+        metrics.set_gauge(f"{self.name}_breaker", value)
+
+    def check(self) -> None:
+        """Raise CircuitOpen while the breaker is open and still cooling down"""
+        if self.state == OPEN and time.monotonic() - self.opened_at < BREAKER_COOLDOWN:
+            metrics.increment(f"{self.name}_rejects")
+            raise CircuitOpen(f"{self.name} breaker is open")
+
+    def _admit(self) -> bool:
+        """Let a call through, returns whether it is the half-open probe"""
+        self.check()
+        if self.state == OPEN:
+            self._set_state(HALF_OPEN)
+        if self.state == CLOSED:
+            return False
+        if self.probing:
+            metrics.increment(f"{self.name}_rejects")
+            raise CircuitOpen(f"{self.name} breaker is probing")
+        self.probing = True
+        return True
+
+    def _record(self, failed: bool, probe: bool) -> None:
+        if probe:
+            self.probing = False
+            if failed:
+                self._trip()
+            else:
+                self.outcomes.clear()
+                self._set_state(CLOSED)
+                logger.info(f"✅ {self.name} breaker closed, dependency recovered")
+            return
+
+        # Calls started before the breaker opened do not count any more
+        if self.state != CLOSED:
+            return
+        self.outcomes.append(failed)
+        if len(self.outcomes) >= BREAKER_MIN_CALLS and sum(self.outcomes) / len(self.outcomes) >= BREAKER_FAILURE_RATE:
+            self._trip()
+
+    def _trip(self) -> None:
+        self.trips += 1
+        self.opened_at = time.monotonic()
+        self.outcomes.clear()
+        self._set_state(OPEN)
+        metrics.increment(f"{self.name}_trips")
+        logger.warning(f"🔌 {self.name} breaker tripped - failing fast for {BREAKER_COOLDOWN:.0f}s")
+
+    async def call(self, factory: Callable[[], Awaitable[any]], retries: Optional[int] = None) -> any:
+        """
+        Run a call under the deadline, breaker and retry policy.
+
+        The deadline is shared by all attempts, so a call never takes longer than
+        the breaker's timeout.
+
+        Args:
+            factory: Returns a fresh awaitable for every attempt.
+            retries: Overrides the breaker's retry count (0 for calls that must not repeat).
+
+        Returns:
+            Whatever the call returns. Raises CircuitOpen when the breaker is open,
+            otherwise the error of the last attempt.
+        """
+        retries = self.retries if retries is None else retries
+        deadline = time.monotonic() + self.timeout
+        for attempt in range(retries + 1):
+            probe = self._admit()
+            started = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(factory(), max(deadline - time.monotonic(), 0.001))
+            except asyncio.CancelledError:
+                if probe:
+                    self.probing = False
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    metrics.increment(f"{self.name}_deadlines")
+                self._record(self.failure(e), probe)
+                backoff = random.uniform(0, RETRY_BASE_DELAY * 2 ** attempt)
+                if attempt == retries or not self.retryable(e) or time.monotonic() + backoff >= deadline:
+                    raise
+                metrics.increment(f"{self.name}_retries")
+                await asyncio.sleep(backoff)
+            else:
+                elapsed = time.perf_counter() - started
+                metrics.observe(f"{self.name}_latency", elapsed)
+                self._record(elapsed > self.slow_call, probe)
+                return result
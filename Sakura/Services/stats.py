@@ -5,6 +5,12 @@ from pyrogram import Client
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup, LinkPreviewOptions
 from pyrogram.enums import ParseMode
 from Sakura.Core.helpers import log_action
+from Sakura.Database.valkey import breaker, breaker_status
+from Sakura.Database.cache import local_cache
+from Sakura.Chat import persona
+from Sakura.Services import metrics
+from Sakura.Services.expiry import expiry_index
+from Sakura.Services.resilience import breakers
 from Sakura import state
 
 async def send_stats(chat_id: int, client: Client, is_refresh: bool = False):
@@ -62,6 +68,17 @@ async def send_stats(chat_id: int, client: Client, is_refresh: bool = False):
             except Exception as e:
                 log_action("ERROR", f"Error getting database stats: {e}", {})
 
+        pipeline_batches = metrics.counters.get('pipeline_batches', 0)
+        pipeline_commands = metrics.counters.get('pipeline_commands', 0)
+        valkey_status = breaker_status()
+        valkey_icon = "✅" if valkey_status == "connected" else "⚠️"
+        dependency_lines = "\n".join(
+            f"{'└' if index == len(breakers) - 1 else '├'} {name}: <b>{'✅' if dependency.status == 'closed' else '⚠️'} {dependency.status}</b> "
+            f"({dependency.trips} trips, {metrics.counters.get(f'{name}_deadlines', 0)} timeouts, "
+            f"{metrics.counters.get(f'{name}_retries', 0)} retries, p50/p99 {metrics.latency(f'{name}_latency')})"
+            for index, (name, dependency) in enumerate(breakers.items())
+        ) or "└ No outbound calls yet"
+
         stats_message = f"""📊 <b>Sakura Bot Statistics</b>
 <i>Last Updated: {current_time.strftime('%H:%M:%S')}</i>
 
@@ -78,6 +95,58 @@ async def send_stats(chat_id: int, client: Client, is_refresh: bool = False):
 ├ Total Revenue: <b>{db_stats['total_revenue']} ⭐</b>
 └ Recent Purchases (24h): <b>{db_stats.get('recent_purchases', 'N/A')}</b>
 
+🗄️ <b>Valkey</b>
+├ Status: <b>{valkey_icon} {valkey_status}</b>
+├ Breaker Trips: <b>{breaker['trips']}</b>
+├ Fallback Memory: <b>{state.conversation_history.total_size // 1024}KB</b> ({metrics.counters.get('fallback_evictions', 0)} evicted)
+├ Spilled To Disk: <b>{metrics.counters.get('spill_writes', 0)}</b> written, <b>{metrics.counters.get('spill_reads', 0)}</b> restored
+├ Pipelined Commands: <b>{pipeline_commands}</b> in <b>{pipeline_batches}</b> batches
+├ Round Trips Saved: <b>{pipeline_commands - pipeline_batches}</b>
+├ Max Batch Size: <b>{metrics.percentile('pipeline_batch_size', 100, 0)}</b>
+├ Batch RTT p50/p99: <b>{metrics.latency('pipeline_rtt')}</b>
+├ Rate Limit Check p50/p99: <b>{metrics.latency('rate_limit_check')}</b>
+└ Rejected Locally: <b>{metrics.counters.get('rate_limit_local_rejects', 0)}</b>
+
+⚡ <b>Cache</b>
+├ L1 Entries: <b>{len(local_cache)}</b>
+├ L1 Hits: <b>{metrics.counters.get('cache_l1_hits', 0)}</b>
+├ L2 Hits: <b>{metrics.counters.get('cache_l2_hits', 0)}</b>
+├ Misses: <b>{metrics.counters.get('cache_misses', 0)}</b>
+├ Coalesced Loads: <b>{metrics.counters.get('cache_coalesced', 0)}</b>
+├ Evictions: <b>{metrics.counters.get('cache_evictions', 0)}</b>
+├ Invalidations: <b>{metrics.counters.get('cache_invalidations', 0)}</b>
+├ Poll Answers Hit Rate: <b>{metrics.ratio('poll_cache_hits', 'poll_cache_misses')}</b>
+├ Image Descriptions Hit Rate: <b>{metrics.ratio('image_cache_hits', 'image_cache_misses')}</b> ({metrics.counters.get('image_bytes_saved', 0) // 1024}KB not re-sent)
+└ Image Download Saved: <b>{metrics.counters.get('image_bytes_skipped', 0) // 1024}KB</b> by size selection, <b>{metrics.counters.get('image_shrinks', 0)}</b> downscaled
+
+🧹 <b>Expiry</b>
+├ Tracked Keys: <b>{len(expiry_index)}</b>
+├ Expired Conversations: <b>{metrics.counters.get('expired_conversation', 0)}</b>
+└ Expired Rate Limits: <b>{metrics.counters.get('expired_rate_limit', 0)}</b>
+
+🤖 <b>Responses</b>
+├ Fast Path Hit Rate: <b>{metrics.ratio('fast_path_hits', 'fast_path_misses')}</b> ({metrics.counters.get('fast_path_hits', 0)} AI calls saved)
+├ Bursts Coalesced: <b>{metrics.counters.get('debounce_merged', 0)}</b> messages in <b>{metrics.counters.get('debounce_bursts', 0)}</b> bursts ({metrics.counters.get('debounce_floods', 0)} floods blocked)
+├ Debounce Wait p50/p99: <b>{metrics.latency('debounce_wait')}</b>
+├ First Text (streamed) p50/p99: <b>{metrics.latency('ttft_stream')}</b>
+├ First Text (full) p50/p99: <b>{metrics.latency('ttft_full')}</b>
+├ Stream Edits: <b>{metrics.counters.get('stream_edits', 0)}</b>
+├ Gemini Latency p50/p99: <b>{metrics.latency('gemini_latency')}</b>
+├ Routed Fast / Vision / Default: <b>{metrics.counters.get('route_fast', 0)}</b> / <b>{metrics.counters.get('route_vision', 0)}</b> / <b>{metrics.counters.get('route_default', 0)}</b>
+├ Hedged: <b>{metrics.counters.get('hedge_fired', 0)}</b> of <b>{metrics.counters.get('hedge_eligible', 0)}</b> ({metrics.ratio('hedge_fired', 'hedge_skipped')}), backup won <b>{metrics.ratio('hedge_wins', 'hedge_losses')}</b>
+├ In Flight / Queued: <b>{metrics.gauges.get('gemini_active', 0)}</b> / <b>{metrics.gauges.get('gemini_queue', 0)}</b>
+├ Queue Wait p50/p99: <b>{metrics.latency('gemini_wait')}</b>
+├ Shed: <b>{metrics.counters.get('gemini_shed', 0)}</b> full, <b>{metrics.counters.get('gemini_timeouts', 0)}</b> timed out
+├ Prompt Tokens p50/p99: <b>{metrics.percentile('prompt_tokens', 50, 'N/A')}</b> / <b>{metrics.percentile('prompt_tokens', 99, 'N/A')}</b>
+├ Budget Throttled: <b>{metrics.counters.get('budget_reduced', 0)}</b> reduced, <b>{metrics.counters.get('budget_fallbacks', 0)}</b> fallbacks (/tokens for top users)
+├ Context Turns p50: <b>{metrics.percentile('context_turns', 50, 'N/A')}</b> ({metrics.counters.get('summary_refreshes', 0)} summaries)
+├ Persona: <b>{'cached' if persona.persona_cached() else 'system instruction'}</b>
+├ API Keys: <b>{state.gemini_pool.healthy_count if state.gemini_pool else 0}</b> healthy of <b>{len(state.gemini_pool.keys) if state.gemini_pool else 0}</b> ({metrics.counters.get('gemini_rate_limited', 0)} quota hits, {metrics.counters.get('gemini_failovers', 0)} failovers)
+└ Cached Input Tokens: <b>{metrics.counters.get('gemini_cached_tokens', 0)}</b> / <b>{metrics.counters.get('gemini_prompt_tokens', 0)}</b> ({metrics.ratio('gemini_cached_tokens', 'gemini_uncached_tokens')})
+
+🛡️ <b>Dependencies</b>
+{dependency_lines}
+
 🖥️ <b>System Resources</b>
 ├ CPU Usage: <b>{cpu_percent}%</b>
 └ Memory: <b>{memory.percent}%</b> ({memory.used // (1024 ** 3)}GB / {memory.total // (1024 ** 3)}GB)"""
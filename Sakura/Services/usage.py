@@ -0,0 +1,156 @@
+import time
+from typing import Optional
+from Sakura.Core.config import USER_TOKEN_BUDGET, TOKEN_BUDGET_HARD, USAGE_RETENTION
+from Sakura.Core.logging import logger
+from Sakura.Database.valkey import mark_failure
+from Sakura.Database.pipeline import run
+from Sakura.Services import metrics
+from Sakura import state
+
+USAGE_FIELDS = ("input", "output", "cached")
+
+# Budget tiers, cheapest last
+TIER_FULL = "full"
+TIER_REDUCED = "reduced"
+TIER_FALLBACK = "fallback"
+
+# TOKEN ACCOUNTING
+# The token counts Gemini reports for a reply are queued on the same pipeline that
+# commits the turn. Lifetime counters live in "tokens:user:{id}" and "tokens:chat:{id}"
+# hashes, daily rollups in the "tokens:{day}" hash and the "tokens:{day}:users" and
+# "tokens:{day}:chats" sorted sets, which also rank the top consumers. Only uncached
+# input and output count towards the daily USER_TOKEN_BUDGET, cached input is tracked
+# but billed at a fraction. Calls shared between users (cached poll answers and image
+# descriptions) only add to the daily totals.
+def new_usage() -> dict:
+    """Empty token counts for one request"""
+    return dict.fromkeys(USAGE_FIELDS, 0)
+
+def record_usage(usage, tokens: Optional[dict] = None) -> None:
+    """Count prompt, cached and output tokens reported by Gemini, adding them to tokens if given"""
+    if not usage:
+        return
+    prompt_tokens = usage.prompt_token_count or 0
+    cached_tokens = usage.cached_content_token_count or 0
+    output_tokens = usage.candidates_token_count or 0
+    metrics.observe("prompt_tokens", prompt_tokens)
+    metrics.increment("gemini_prompt_tokens", prompt_tokens)
+    metrics.increment("gemini_cached_tokens", cached_tokens)
+    metrics.increment("gemini_uncached_tokens", prompt_tokens - cached_tokens)
+    metrics.increment("gemini_output_tokens", output_tokens)
+    if tokens is not None:
+        tokens["input"] += prompt_tokens - cached_tokens
+        tokens["cached"] += cached_tokens
+        tokens["output"] += output_tokens
+
+def today() -> str:
+    """The UTC day the daily rollups are keyed by"""
+    return time.strftime("%Y%m%d", time.gmtime())
+
+def charged(usage: dict) -> int:
+    """Tokens of a request that count towards the daily budget"""
+    return usage["input"] + usage["output"]
+
+def queue_usage(pipe, user_id: Optional[int], chat_id: Optional[int], usage: dict) -> None:
+    """Queue the counter updates for one request on a pipeline (None skips that owner)"""
+    day = today()
+    keys = [f"tokens:{day}"]
+    if user_id is not None:
+        keys.append(f"tokens:user:{user_id}")
+    if chat_id is not None:
+        keys.append(f"tokens:chat:{chat_id}")
+    for key in keys:
+        for field in USAGE_FIELDS:
+            if usage[field]:
+                pipe.hincrby(key, field, usage[field])
+        pipe.expire(key, USAGE_RETENTION)
+    total = charged(usage)
+    for kind, owner in (("users", user_id), ("chats", chat_id)):
+        if owner is not None:
+            pipe.zincrby(f"tokens:{day}:{kind}", total, owner)
+            pipe.expire(f"tokens:{day}:{kind}", USAGE_RETENTION)
+
+async def add_usage(user_id: Optional[int], chat_id: Optional[int], usage: dict) -> None:
+    """Record the tokens of a call that commits no turn in their own round trip"""
+    if not state.valkey_client or not any(usage.values()):
+        return
+    try:
+        pipe = state.valkey_client.pipeline(transaction=False)
+        queue_usage(pipe, user_id, chat_id, usage)
+        await pipe.execute()
+    except Exception as e:
+        mark_failure(e)
+        logger.error(f"❌ Failed to record token usage for user {user_id}: {e}")
+
+def budget_tier(used: int) -> str:
+    """
+    The service tier for a user who was charged `used` tokens today.
+
+    Past USER_TOKEN_BUDGET replies use a shorter context and a cheaper model, past
+    TOKEN_BUDGET_HARD times the budget they come from the canned fallbacks.
+    """
+    if not USER_TOKEN_BUDGET or used < USER_TOKEN_BUDGET:
+        return TIER_FULL
+    if used < USER_TOKEN_BUDGET * TOKEN_BUDGET_HARD:
+        metrics.increment("budget_reduced")
+        return TIER_REDUCED
+    metrics.increment("budget_fallbacks")
+    return TIER_FALLBACK
+
+async def top_consumers(kind: str = "users", limit: int = 10) -> list:
+    """Today's heaviest users or chats as (id, tokens) pairs"""
+    if not state.valkey_client:
+        return []
+    try:
+        ranked = await run("ZREVRANGE", f"tokens:{today()}:{kind}", 0, limit - 1, "WITHSCORES")
+        return [(int(ranked[i]), int(float(ranked[i + 1]))) for i in range(0, len(ranked), 2)]
+    except Exception as e:
+        mark_failure(e)
+        logger.error(f"❌ Failed to get top token consumers: {e}")
+        return []
+
+async def daily_totals(day: Optional[str] = None) -> dict:
+    """Input, output and cached tokens of one day (today by default)"""
+    totals = new_usage()
+    if not state.valkey_client:
+        return totals
+    try:
+        raw = await run("HGETALL", f"tokens:{day or today()}")
+        totals.update({field.decode("utf-8"): int(value) for field, value in raw.items()})
+    except Exception as e:
+        mark_failure(e)
+        logger.error(f"❌ Failed to get daily token totals: {e}")
+    return totals
+
+async def usage_report(limit: int = 10) -> str:
+    """Owner view of today's token usage and its top consumers"""
+    totals = await daily_totals()
+    users = await top_consumers("users", limit)
+    chats = await top_consumers("chats", limit)
+
+    def marker(tokens: int) -> str:
+        if not USER_TOKEN_BUDGET or tokens < USER_TOKEN_BUDGET:
+            return ""
+        return " 🔻" if tokens < USER_TOKEN_BUDGET * TOKEN_BUDGET_HARD else " ⛔"
+
+    lines = [
+        "🪙 <b>Token Usage</b>",
+        f"<i>Day: {today()} (UTC)</i>",
+        "",
+        f"├ Input: <b>{totals['input']}</b>",
+        f"├ Cached Input: <b>{totals['cached']}</b>",
+        f"├ Output: <b>{totals['output']}</b>",
+        f"└ Daily Budget: <b>{USER_TOKEN_BUDGET or 'off'}</b> per user",
+        "",
+        "👤 <b>Top Users</b>",
+    ]
+    lines += [
+        f"{'└' if i == len(users) - 1 else '├'} <a href='tg://user?id={user_id}'>{user_id}</a>: <b>{tokens}</b>{marker(tokens)}"
+        for i, (user_id, tokens) in enumerate(users)
+    ] or ["└ None yet"]
+    lines += ["", "👥 <b>Top Chats</b>"]
+    lines += [
+        f"{'└' if i == len(chats) - 1 else '├'} <code>{chat_id}</code>: <b>{tokens}</b>"
+        for i, (chat_id, tokens) in enumerate(chats)
+    ] or ["└ None yet"]
+    return "\n".join(lines)
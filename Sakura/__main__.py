@@ -8,8 +8,12 @@ from Sakura.Core.server import start_server_thread
 from Sakura.Core.utils import validate_config
 from Sakura.Database.database import connect_database, close_database
 from Sakura.Database.valkey import connect_cache, close_cache
+from Sakura.Database.cache import listen_invalidations
+from Sakura.Database.spill import spill_store
+from Sakura.Database.conversation import reconcile_history
 from Sakura.Services.cleanup import cleanup_conversations
 from Sakura.Chat.chat import init_client
+from Sakura.Chat.persona import refresh_persona, delete_persona_cache
 from Sakura import state
 from Sakura.Modules.commands import COMMANDS
 
@@ -29,15 +33,21 @@ async def setup_commands(app: Client) -> None:
 
 async def post_init(app: Client):
     """Post initialization tasks"""
+    state.effects_client = app
+    await spill_store.open()
     valkey_success = await connect_cache()
     if not valkey_success:
         logger.warning("⚠️ Valkey initialization failed. Bot will continue with memory fallback.")
+    else:
+        await reconcile_history()
     db_success = await connect_database()
     if not db_success:
         logger.error("❌ Database initialization failed. Bot will continue without persistence.")
 
     await setup_commands(app)
     state.cleanup_task = asyncio.create_task(cleanup_conversations())
+    state.invalidation_task = asyncio.create_task(listen_invalidations())
+    state.persona_task = asyncio.create_task(refresh_persona())
     logger.info("🌸 Sakura Bot initialization completed!")
 
 
@@ -50,7 +60,21 @@ async def post_shutdown(app: Client):
             await state.cleanup_task
         except asyncio.CancelledError:
             logger.info("✅ Cleanup task cancelled successfully")
+    if state.invalidation_task and not state.invalidation_task.done():
+        state.invalidation_task.cancel()
+        try:
+            await state.invalidation_task
+        except asyncio.CancelledError:
+            pass
+    if state.persona_task and not state.persona_task.done():
+        state.persona_task.cancel()
+        try:
+            await state.persona_task
+        except asyncio.CancelledError:
+            pass
+    await delete_persona_cache()
     await close_database()
+    await spill_store.close()
     await close_cache()
     logger.info("🌸 Sakura Bot shutdown completed!")
 
@@ -1,19 +1,23 @@
-from typing import Dict, Set, Optional, List
+from collections import deque
+from typing import Dict, Set, Optional
 from pyrogram import Client
 from valkey.asyncio import Valkey as AsyncValkey
-from google import genai
+from Sakura.Database.fallback import HistoryStore
 
 # GLOBAL STATE & MEMORY SYSTEM
 user_ids: Set[int] = set()
 group_ids: Set[int] = set()
 broadcast_mode: Dict[int, str] = {}
-user_message_counts: Dict[str, List] = {}
-rate_limited_users: Dict[str, float] = {}
 user_last_response_time: Dict[int, float] = {}
-conversation_history: Dict[int, list] = {}
+conversation_history: HistoryStore = HistoryStore()
+conversation_turns: Dict[int, deque] = {}
 db_pool = None
 cleanup_task = None
+invalidation_task = None
+persona_task = None
 valkey_client: Optional[AsyncValkey] = None
+valkey_standby: Optional[AsyncValkey] = None
+valkey_probe_task = None
 payment_storage: Dict[str, dict] = {}
 effects_client: Optional[Client] = None
-gemini_client: Optional[genai.Client] = None
+gemini_pool = None
@@ -0,0 +1,106 @@
+"""
+Valkey payload size and CPU per message for synthetic Hinglish histories.
+
+"json" is the old layout: one JSON blob per user, read back through a UTF-8
+decoding connection. The other rows store every message with
+Sakura.Database.codec.encode_turn: tagged only, with zstd, and with zstd and a
+dictionary trained on a separate set of histories. "write us/exch" is the CPU
+an exchange costs on the write path: the old layout read, decoded, re-encoded and
+wrote the whole blob for each of its two messages, the list encodes two items.
+
+    python benchmarks/codec.py [users]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+import zstandard
+
+from Sakura.Core.config import CHAT_LENGTH
+from Sakura.Database import codec
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+USER_WORDS = (
+    "yaar kya kar rahi ho aaj mujhe bhi batao na main bahut bore ho raha hoon college se abhi aaya "
+    "tum kaisi ho kal movie dekhne chalein kya sach mein pata nahi kyun aisa lagta hai thoda sa "
+    "help karo please exam ki tension hai bhai mood off hai good night sakura love you"
+).split()
+SAKURA_WORDS = (
+    "aww tum itne cute ho main yahin hoon tumhare liye batao kya hua chinta mat karo sab theek ho "
+    "jayega thoda aaram karo pehle khana khaya ya nahi mujhe bhi tumhari yaad aa rahi thi hehe "
+    "bilkul chalo saath mein dekhte hain tum best ho 🌸 💕 ✨"
+).split()
+
+
+def history(rng: random.Random) -> list:
+    messages = []
+    for _ in range(CHAT_LENGTH // 2):
+        messages.append({"role": "user", "content": " ".join(rng.choices(USER_WORDS, k=rng.randint(3, 18)))})
+        messages.append({"role": "assistant", "content": " ".join(rng.choices(SAKURA_WORDS, k=rng.randint(6, 30)))})
+    return messages
+
+
+def timed(func, items: list) -> tuple:
+    started = time.perf_counter()
+    results = [func(item) for item in items]
+    return results, time.perf_counter() - started
+
+
+def measure_json(histories: list) -> tuple:
+    blobs, encode_time = timed(orjson.dumps, histories)
+    # The old connection decoded every reply to str before orjson parsed it
+    _, decode_time = timed(lambda blob: orjson.loads(blob.decode("utf-8")), blobs)
+    return sum(len(blob) for blob in blobs), encode_time, decode_time
+
+
+def measure_codec(histories: list) -> tuple:
+    messages = [message for messages in histories for message in messages]
+    items, encode_time = timed(codec.encode_turn, messages)
+    _, decode_time = timed(codec.decode_turn, items)
+    return sum(len(item) for item in items), encode_time, decode_time
+
+
+def main() -> None:
+    rng = random.Random(42)
+    training = [history(rng) for _ in range(USERS)]
+    histories = [history(rng) for _ in range(USERS)]
+    messages = USERS * CHAT_LENGTH
+
+    codec._compressor = None
+    samples = [codec.encode_turn(message) for messages in training for message in messages]
+    dictionary = zstandard.ZstdCompressionDict(codec.train_dictionary(samples))
+
+    setups = [
+        ("json", None),
+        ("tagged", None),
+        ("zstd", zstandard.ZstdCompressor(level=3, write_content_size=True, write_dict_id=True)),
+        ("zstd+dict", zstandard.ZstdCompressor(level=3, dict_data=dictionary, write_content_size=True, write_dict_id=True)),
+    ]
+    codec._decompressors[0] = zstandard.ZstdDecompressor()
+    codec._decompressors[dictionary.dict_id()] = zstandard.ZstdDecompressor(dict_data=dictionary)
+
+    print(f"{USERS} users x {CHAT_LENGTH} messages, dictionary trained on {len(samples)} other messages")
+    print(f"{'layout':<11}{'bytes/msg':>10}{'vs json':>9}{'encode us/msg':>15}{'decode us/msg':>15}{'write us/exch':>15}")
+    baseline = None
+    for name, compressor in setups:
+        if name == "json":
+            size, encode_time, decode_time = measure_json(histories)
+            baseline = size
+            write = 2 * (encode_time + decode_time) / USERS
+        else:
+            codec._compressor = compressor
+            size, encode_time, decode_time = measure_codec(histories)
+            write = 2 * encode_time / messages
+        print(
+            f"{name:<11}{size / messages:>10.1f}{size / baseline:>8.0%}"
+            f"{encode_time / messages * 1e6:>15.2f}{decode_time / messages * 1e6:>15.2f}{write * 1e6:>15.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
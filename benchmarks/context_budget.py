@@ -0,0 +1,88 @@
+"""
+Prompt size per reply before and after the token-budgeted context builder.
+
+"last 20" is the old context: the whole CHAT_LENGTH list, whatever its length.
+"budget" is Sakura.Chat.context.fit_history with CONTEXT_TOKEN_BUDGET and the
+running summary. Users mostly send short Hinglish lines and sometimes paste a
+long text. Summary refreshes are simulated: each one lands a few messages after
+it is scheduled, like the background task, and yields a 5 sentence summary.
+Gemini latency itself grows with these prompt sizes and is shown live in /stats;
+"fit us" is the builder's own CPU per reply.
+
+    python benchmarks/context_budget.py [users] [exchanges]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Sakura.Core.config import CHAT_LENGTH, CONTEXT_TOKEN_BUDGET
+from Sakura.Chat import context
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+EXCHANGES = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+# Messages between scheduling a summary refresh and it being stored
+SUMMARY_LAG = 4
+SUMMARY = "Rohan ka exam kal hai aur woh nervous hai. " * 5
+WORDS = "yaar kya kar rahi ho aaj mujhe bhi batao na tum kaisi ho main yahin hoon chinta mat karo".split()
+
+
+def message(rng: random.Random, long_share: float) -> str:
+    words = rng.randint(150, 600) if rng.random() < long_share else rng.randint(3, 25)
+    return " ".join(rng.choices(WORDS, k=words))
+
+
+def percentiles(values: list) -> tuple:
+    values = sorted(values)
+    return tuple(values[min(int(len(values) * share), len(values) - 1)] for share in (0.5, 0.95, 0.99)) + (values[-1],)
+
+
+def simulate(rng: random.Random) -> tuple:
+    before, after, fit_times = [], [], []
+    pending = {}
+
+    def schedule(user_id, summary, turns, mark):
+        if user_id not in pending:
+            pending[user_id] = (step + SUMMARY_LAG, {"text": SUMMARY, "mark": mark})
+
+    context.schedule_summary = schedule
+    for user_id in range(USERS):
+        long_share = rng.choice((0.0, 0.02, 0.1))
+        history, summary, committed = [], None, 0
+        for step in range(EXCHANGES):
+            ready = pending.get(user_id)
+            if ready and ready[0] <= step:
+                summary = ready[1]
+                del pending[user_id]
+
+            incoming = {"role": "user", "content": message(rng, long_share)}
+            before.append(sum(context.estimate_tokens(msg["content"]) for msg in history + [incoming]))
+
+            started = time.perf_counter()
+            sent, summary_text = context.fit_history(user_id, history, summary, committed=committed)
+            fit_times.append(time.perf_counter() - started)
+            after.append(
+                sum(context.estimate_tokens(msg["content"]) for msg in sent + [incoming])
+                + (context.estimate_tokens(summary_text) if summary_text else 0)
+            )
+
+            history = (history + [incoming, {"role": "assistant", "content": message(rng, 0.05)}])[-CHAT_LENGTH:]
+            committed += 2
+        pending.pop(user_id, None)
+    return before, after, fit_times
+
+
+def main() -> None:
+    before, after, fit_times = simulate(random.Random(11))
+    print(f"{USERS} users x {EXCHANGES} exchanges, CONTEXT_TOKEN_BUDGET={CONTEXT_TOKEN_BUDGET}, CHAT_LENGTH={CHAT_LENGTH}")
+    print(f"{'context':<9}{'p50 tok':>9}{'p95 tok':>9}{'p99 tok':>9}{'max tok':>9}{'mean tok':>10}{'fit us':>8}")
+    for name, sizes, fit in (("last 20", before, None), ("budget", after, fit_times)):
+        p50, p95, p99, peak = percentiles(sizes)
+        cost = f"{sum(fit) / len(fit) * 1e6:>8.1f}" if fit else f"{'-':>8}"
+        print(f"{name:<9}{p50:>9}{p95:>9}{p99:>9}{peak:>9}{sum(sizes) / len(sizes):>10.0f}{cost}")
+
+
+if __name__ == "__main__":
+    main()
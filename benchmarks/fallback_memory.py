@@ -0,0 +1,74 @@
+"""
+Memory per user of the in-memory conversation fallback at 100k users.
+
+"dict" is the old fallback, a dict of per-user lists of message dicts trimmed
+by slicing. "store" is Sakura.Database.fallback.HistoryStore without a budget,
+so every user stays. The last column compares the store's own size estimate,
+which drives LRU eviction, with what tracemalloc measured. The last run uses
+the default HISTORY_MEMORY_BUDGET.
+
+    python benchmarks/fallback_memory.py [users]
+"""
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Sakura.Core.config import CHAT_LENGTH, HISTORY_MEMORY_BUDGET
+from Sakura.Database.fallback import HistoryStore
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+WORDS = "yaar kya kar rahi ho aaj mujhe bhi batao na tum kaisi ho main yahin hoon chinta mat karo".split()
+
+
+def exchanges(rng: random.Random) -> list:
+    """Messages of a full history, built fresh so contents are distinct objects"""
+    messages = []
+    for index in range(CHAT_LENGTH // 2 + 2):
+        messages.append({"role": "user", "content": " ".join(rng.choices(WORDS, k=rng.randint(3, 15))) + f" {index}"})
+        messages.append({"role": "assistant", "content": " ".join(rng.choices(WORDS, k=rng.randint(6, 25))) + f" {index}"})
+    return messages
+
+
+def fill_dict(rng: random.Random):
+    history = {}
+    for user_id in range(USERS):
+        for message in exchanges(rng):
+            history.setdefault(user_id, []).append(message)
+            if len(history[user_id]) > CHAT_LENGTH:
+                history[user_id] = history[user_id][-CHAT_LENGTH:]
+    return history
+
+
+def fill_store(rng: random.Random, budget: int):
+    store = HistoryStore(budget=budget)
+    for user_id in range(USERS):
+        messages = exchanges(rng)
+        for index in range(0, len(messages), 2):
+            store.extend(user_id, messages[index:index + 2])
+    return store
+
+
+def measure(name: str, fill) -> None:
+    rng = random.Random(7)
+    tracemalloc.start()
+    result = fill(rng)
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    users = len(result)
+    estimate = f"{result.total_size / used:>9.0%}" if isinstance(result, HistoryStore) else f"{'-':>9}"
+    print(f"{name:<14}{users:>8}{used / 2 ** 20:>10.1f}{used / users:>11.0f}{estimate}")
+
+
+def main() -> None:
+    print(f"{USERS} users, {CHAT_LENGTH} messages kept each")
+    print(f"{'fallback':<14}{'users':>8}{'MB':>10}{'B/user':>11}{'estimate':>9}")
+    measure("dict", fill_dict)
+    measure("store", lambda rng: fill_store(rng, sys.maxsize))
+    measure(f"store {HISTORY_MEMORY_BUDGET >> 20} MB", lambda rng: fill_store(rng, HISTORY_MEMORY_BUDGET))
+
+
+if __name__ == "__main__":
+    main()
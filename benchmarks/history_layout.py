@@ -0,0 +1,127 @@
+"""
+Conversation history layouts in Valkey at 10k concurrent users.
+
+"blob" is the old layout: one JSON string per user, updated by GET, append and
+SETEX for each of the two messages of an exchange. "list" is the native list
+written by Sakura.Database.conversation.commit_turn (one script call per exchange).
+Every user sends two exchanges at the same time, which is where the blob layout
+loses writes.
+
+    VALKEY_URL=valkey://localhost:6379/15 python benchmarks/history_layout.py [users] [rounds] [connections]
+
+The benchmark flushes the selected database.
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from valkey.asyncio import BlockingConnectionPool, Valkey
+
+from Sakura.Core.config import CHAT_LENGTH, SESSION_TTL
+from Sakura.Database import conversation
+from Sakura import state
+from traffic import Traffic
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+ROUNDS = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+CONNECTIONS = int(sys.argv[3]) if len(sys.argv) > 3 else 64
+MESSAGE = "kya kar rahi ho aaj, mujhe bhi batao na 🌸"
+REPLY = "Bas tumhare message ka wait kar rahi thi, ab batao tumhara din kaisa gaya?"
+
+
+async def blob_message(client: Valkey, user_id: int, message: dict) -> None:
+    key = f"conversation:{user_id}"
+    existing = await client.get(key)
+    history = orjson.loads(existing) if existing else []
+    history.append(message)
+    await client.setex(key, SESSION_TTL, orjson.dumps(history[-CHAT_LENGTH:]))
+
+
+async def blob_exchange(client: Valkey, user_id: int, turn: str) -> None:
+    await blob_message(client, user_id, {"role": "user", "content": f"{MESSAGE} {turn}"})
+    await blob_message(client, user_id, {"role": "assistant", "content": f"{REPLY} {turn}"})
+
+
+async def list_exchange(client: Valkey, user_id: int, turn: str) -> None:
+    await conversation.commit_turn(user_id, f"{MESSAGE} {turn}", f"{REPLY} {turn}", turn)
+
+
+async def stored(client: Valkey, layout: str) -> tuple:
+    """Messages kept per user and bytes stored, read back after the run"""
+    messages = size = 0
+    for user_id in range(USERS):
+        key = f"conversation:{user_id}"
+        if layout == "blob":
+            raw = await client.get(key)
+            messages += len(orjson.loads(raw))
+            size += len(raw)
+        else:
+            items = await client.lrange(key, 0, -1)
+            messages += len(items)
+            size += sum(len(item) for item in items)
+    return messages / USERS, size / USERS
+
+
+async def run(client: Valkey, traffic: Traffic, layout: str) -> dict:
+    exchange = blob_exchange if layout == "blob" else list_exchange
+    latencies = []
+
+    async def user(user_id: int, turn: str):
+        started = time.perf_counter()
+        await exchange(client, user_id, turn)
+        latencies.append(time.perf_counter() - started)
+
+    await client.flushdb()
+    traffic.reset()
+    started = time.perf_counter()
+    for round_index in range(ROUNDS):
+        # Two exchanges per user at once, like a double text answered twice
+        await asyncio.gather(*[
+            user(user_id, f"{round_index}:{copy}") for user_id in range(USERS) for copy in range(2)
+        ])
+    elapsed = time.perf_counter() - started
+    exchanges = len(latencies)
+    round_trips, sent = traffic.round_trips, traffic.sent
+
+    kept, size = await stored(client, layout)
+    latencies.sort()
+    return {
+        "layout": layout,
+        "exchanges_per_s": exchanges / elapsed,
+        "p50_ms": latencies[exchanges // 2] * 1000,
+        "p99_ms": latencies[int(exchanges * 0.99)] * 1000,
+        "round_trips": round_trips / exchanges,
+        "bytes_sent": sent / exchanges,
+        "kept": kept,
+        "expected": min(ROUNDS * 4, CHAT_LENGTH),
+        "stored_bytes": size,
+    }
+
+
+async def main() -> None:
+    url = os.getenv("VALKEY_URL")
+    if not url:
+        sys.exit("Set VALKEY_URL to a Valkey database the benchmark may flush")
+    traffic = Traffic()
+    client = Valkey(connection_pool=BlockingConnectionPool.from_url(url, max_connections=CONNECTIONS, timeout=None))
+    state.valkey_client = client
+    await conversation.commit_script_sha()
+
+    print(f"{USERS} users, {ROUNDS} rounds of 2 concurrent exchanges, {CONNECTIONS} connections")
+    print(f"{'layout':<8}{'exch/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'RTT/exch':>10}{'sent B':>9}{'kept/user':>11}{'stored B':>10}")
+    for layout in ("blob", "list"):
+        row = await run(client, traffic, layout)
+        print(
+            f"{row['layout']:<8}{row['exchanges_per_s']:>9.0f}{row['p50_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+            f"{row['round_trips']:>10.2f}{row['bytes_sent']:>9.0f}{row['kept']:>6.1f}/{row['expected']:<4}{row['stored_bytes']:>10.0f}"
+        )
+    await client.flushdb()
+    await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
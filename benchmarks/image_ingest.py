@@ -0,0 +1,151 @@
+"""
+Event loop blocking and peak RSS of image ingestion with large photos.
+
+Compares the old path (download the original, base64 it on the loop) with
+Sakura.Chat.media.ingest_image, once with Telegram's usual set of sizes and once
+when only the original is large enough. Every scenario runs in its own process
+so its peak RSS is not hidden by an earlier one.
+
+    python benchmarks/image_ingest.py
+"""
+import asyncio
+import base64
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil
+from PIL import Image
+
+ORIGINAL = (4000, 3000)
+THUMBS = [(90, 68), (320, 240), (800, 600), (1280, 960), (2560, 1920)]
+ROUNDS = 5
+
+
+def make_photos(directory: str) -> dict:
+    """Write a noisy 12 MP JPEG and its Telegram sizes, returns {long side: path}"""
+    noise = Image.effect_noise(ORIGINAL, 60).convert("RGB")
+    gradient = Image.linear_gradient("L").resize(ORIGINAL).convert("RGB")
+    original = Image.blend(noise, gradient, 0.5)
+    paths = {}
+    for width, height in THUMBS + [ORIGINAL]:
+        path = os.path.join(directory, f"{width}.jpg")
+        original.resize((width, height)).save(path, format="JPEG", quality=90)
+        paths[max(width, height)] = path
+    return paths
+
+
+def photo(paths: dict, sides: list) -> SimpleNamespace:
+    """Photo-like object exposing the given sizes as thumbs next to the original"""
+    def size(side):
+        return SimpleNamespace(
+            width=side, height=side * 3 // 4, file_size=os.path.getsize(paths[side]), file_id=str(side)
+        )
+    original = size(max(ORIGINAL))
+    return SimpleNamespace(
+        width=original.width, height=original.height, file_size=original.file_size, file_id=original.file_id,
+        file_unique_id="bench", thumbs=[size(side) for side in sides]
+    )
+
+
+class Client:
+    """Serves download_media from the files on disk"""
+
+    def __init__(self, paths: dict):
+        self.paths = paths
+
+    async def download_media(self, file_id: str, in_memory: bool = True) -> io.BytesIO:
+        with open(self.paths[int(file_id)], "rb") as file:
+            return io.BytesIO(file.read())
+
+
+async def old_path(client: Client, photo: SimpleNamespace) -> int:
+    image_file = await client.download_media(photo.file_id, in_memory=True)
+    image_bytes = image_file.getvalue()
+    return len(base64.b64encode(image_bytes).decode("utf-8"))
+
+
+async def measure(scenario: str, paths: dict) -> dict:
+    from Sakura.Chat.media import ingest_image
+
+    client = Client(paths)
+    if scenario == "old":
+        run, target = old_path, photo(paths, [90, 320, 800, 1280, 2560])
+    elif scenario == "ingest":
+        run, target = ingest_image, photo(paths, [90, 320, 800, 1280, 2560])
+    else:
+        run, target = ingest_image, photo(paths, [90, 320])
+
+    lags = []
+    running = True
+
+    async def ticker():
+        while running:
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - started - 0.001)
+
+    process = psutil.Process()
+    baseline = process.memory_info().rss
+    peak = baseline
+
+    def sample():
+        nonlocal peak
+        while running:
+            peak = max(peak, process.memory_info().rss)
+            time.sleep(0.001)
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    lags.clear()
+    sizes = []
+    for _ in range(ROUNDS):
+        result = await run(client, target)
+        sizes.append(result if isinstance(result, int) else len(result))
+    running = False
+    await tick
+    sampler.join()
+
+    return {
+        "scenario": scenario,
+        "sent_bytes": sizes[-1],
+        "max_block_ms": max(lags) * 1000,
+        "blocked_ms": sum(lag for lag in lags if lag > 0.005) * 1000,
+        "peak_rss_mb": (peak - baseline) / 2 ** 20,
+    }
+
+
+def main() -> None:
+    if len(sys.argv) == 3:
+        paths = {int(side): path for side, path in json.loads(sys.argv[2]).items()}
+        print(json.dumps(asyncio.run(measure(sys.argv[1], paths))))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_photos(directory)
+        print(f"original {ORIGINAL[0]}x{ORIGINAL[1]}, {os.path.getsize(paths[max(ORIGINAL)]) / 1e6:.1f} MB, {ROUNDS} rounds each")
+        print(f"{'scenario':<16}{'sent bytes':>12}{'max block ms':>14}{'blocked ms':>12}{'peak RSS +MB':>14}")
+        for scenario in ("old", "ingest", "original-only"):
+            output = subprocess.run(
+                [sys.executable, __file__, scenario, json.dumps(paths)],
+                capture_output=True, text=True, check=True
+            ).stdout.splitlines()[-1]
+            row = json.loads(output)
+            print(
+                f"{row['scenario']:<16}{row['sent_bytes']:>12}{row['max_block_ms']:>14.1f}"
+                f"{row['blocked_ms']:>12.1f}{row['peak_rss_mb']:>14.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
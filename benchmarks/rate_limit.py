@@ -0,0 +1,118 @@
+"""
+Valkey round trips and latency per rate limit check.
+
+"old" is the check before the limiter script: EXISTS on the hard block key, an
+INCR+TTL pipeline, then EXPIRE or SETEX when needed. "window" and "gcra" run
+Sakura.Services.limiter.rate_limit with each script. Every user sends a burst of
+messages at random gaps, so some checks pass, some are limited and some users
+get hard blocked, which the local tier then answers without Valkey.
+
+    VALKEY_URL=valkey://localhost:6379/15 python benchmarks/rate_limit.py [users] [messages] [connections]
+
+The benchmark flushes the selected database.
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from valkey.asyncio import BlockingConnectionPool, Valkey
+
+from Sakura.Core.config import MESSAGE_LIMIT, RATE_LIMIT_COUNT, RATE_LIMIT_TTL, RATE_LIMIT_LOCAL_SIZE
+from Sakura.Services import limiter
+from Sakura import state
+from traffic import Traffic
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+MESSAGES = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+CONNECTIONS = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+CHAT_ID = -100
+
+
+async def old_check(user_id: int, chat_id: int) -> bool:
+    client = state.valkey_client
+    hard_limit_key = f"hard_rate_limit:{user_id}:{chat_id}"
+    if await client.exists(hard_limit_key):
+        return True
+    message_count_key = f"message_count:{user_id}:{chat_id}"
+    pipe = client.pipeline()
+    pipe.incr(message_count_key)
+    pipe.ttl(message_count_key)
+    count, ttl = await pipe.execute()
+    if ttl == -1:
+        await client.expire(message_count_key, int(MESSAGE_LIMIT))
+    if count > RATE_LIMIT_COUNT:
+        await client.setex(hard_limit_key, RATE_LIMIT_TTL, "1")
+        return True
+    return count > 1
+
+
+async def script_check(user_id: int, chat_id: int) -> bool:
+    limited, _ = await limiter.rate_limit(user_id, chat_id)
+    return limited
+
+
+async def run(traffic: Traffic, name: str) -> dict:
+    if name == "old":
+        check = old_check
+    else:
+        check = script_check
+        limiter.RATE_LIMIT_ALGORITHM = name
+        limiter._limit_script = None
+        limiter.local_limiter = limiter.LocalLimiter(RATE_LIMIT_LOCAL_SIZE)
+    rng = random.Random(3)
+    latencies = []
+    limited = 0
+
+    async def user(user_id: int):
+        nonlocal limited
+        for _ in range(MESSAGES):
+            await asyncio.sleep(rng.uniform(0, 0.6))
+            started = time.perf_counter()
+            limited += await check(user_id, CHAT_ID)
+            latencies.append(time.perf_counter() - started)
+
+    await state.valkey_client.flushdb()
+    if name != "old":
+        # Load the script outside the measurement
+        await state.valkey_client.script_load(
+            limiter.GCRA_LIMIT_SCRIPT if name == "gcra" else limiter.WINDOW_LIMIT_SCRIPT
+        )
+    traffic.reset()
+    await asyncio.gather(*[user(user_id) for user_id in range(USERS)])
+    if not state.valkey_client:
+        sys.exit(f"Valkey breaker tripped during {name}, the rows would mix in the memory limiter")
+    checks = len(latencies)
+    latencies.sort()
+    return {
+        "name": name,
+        "round_trips": traffic.round_trips / checks,
+        "p50_ms": latencies[checks // 2] * 1000,
+        "p99_ms": latencies[int(checks * 0.99)] * 1000,
+        "limited": limited / checks,
+    }
+
+
+async def main() -> None:
+    url = os.getenv("VALKEY_URL")
+    if not url:
+        sys.exit("Set VALKEY_URL to a Valkey database the benchmark may flush")
+    traffic = Traffic()
+    state.valkey_client = Valkey(connection_pool=BlockingConnectionPool.from_url(
+        url, max_connections=CONNECTIONS, timeout=None
+    ))
+
+    print(f"{USERS} users x {MESSAGES} messages at 0-600 ms gaps, {CONNECTIONS} connections")
+    print(f"{'limiter':<8}{'RTT/check':>11}{'p50 ms':>9}{'p99 ms':>9}{'limited':>9}")
+    for name in ("old", "window", "gcra"):
+        row = await run(traffic, name)
+        print(f"{row['name']:<8}{row['round_trips']:>11.2f}{row['p50_ms']:>9.2f}{row['p99_ms']:>9.2f}{row['limited']:>9.0%}")
+    await state.valkey_client.flushdb()
+    await state.valkey_client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,23 @@
+"""Round trip and byte counting shared by the Valkey benchmarks"""
+from valkey.asyncio.connection import Connection
+
+
+class Traffic:
+    """Counts the commands, round trips and bytes a client sends"""
+
+    def __init__(self):
+        self.round_trips = 0
+        self.sent = 0
+        original = Connection.send_packed_command
+
+        async def send_packed_command(connection, command, check_health=True):
+            self.round_trips += 1
+            chunks = command if isinstance(command, list) else [command]
+            self.sent += sum(len(chunk) for chunk in chunks)
+            return await original(connection, command, check_health)
+
+        Connection.send_packed_command = send_packed_command
+
+    def reset(self) -> None:
+        self.round_trips = 0
+        self.sent = 0